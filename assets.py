@@ -0,0 +1,135 @@
+"""画像とフォントのキャッシュ
+
+画像はファイルごとに一度だけ読み込んで画面のピクセル形式に変換し
+（透過PNGは convert_alpha、それ以外は convert）、拡大縮小した画像は
+(パス, サイズ) ごと、フォントはサイズごとに使い回す。描画した文字列も
+(文字列, サイズ, 色) ごとに、上限付きで古いものから捨てながら使い回す。
+
+build_atlas.py で作ったアトラスがあれば、画像（と前もって拡大縮小した画像）は
+アトラスのシートの一部として返す。目録がない・古い項目は個別のファイルから読む。
+"""
+import json
+import os
+from collections import OrderedDict
+
+import pygame as pg
+
+TEXT_CACHE_SIZE = 256  # 覚えておく文字列の画像の数
+ATLAS_INDEX = "fig/atlas.json"  # build_atlas.py が書き出す目録
+ATLAS_VERSION = 1
+
+
+class AssetCache:
+    def __init__(self, atlas_index=ATLAS_INDEX):
+        self.atlas_index = atlas_index  # None ならアトラスを使わない
+        self.atlas = None  # キー -> 目録の項目（最初に画像を読むときに目録を読む）
+        self.sheets = {}  # シートのパス -> 変換済みのシート（読めなければ None）
+        self.images = {}  # パス -> 変換済みの元画像
+        self.scaled_images = {}  # (パス, サイズ) -> 拡大縮小した画像
+        self.fonts = {}  # (フォント名, サイズ) -> Font
+        self.texts = OrderedDict()  # (文字列, サイズ, 色, フォント名) -> 描画済みの Surface
+        self.hits = {"image": 0, "scaled": 0, "font": 0, "text": 0, "atlas": 0}
+        self.misses = {"image": 0, "scaled": 0, "font": 0, "text": 0, "atlas": 0}
+
+    def image(self, path):
+        img = self.images.get(path)
+        if img is not None:
+            self.hits["image"] += 1
+            return img
+        self.misses["image"] += 1
+        img = self.from_atlas(path)
+        if img is None:
+            img = self.load(path)
+        self.images[path] = img
+        return img
+
+    def scaled(self, path, size):
+        key = (path, tuple(size))
+        img = self.scaled_images.get(key)
+        if img is not None:
+            self.hits["scaled"] += 1
+            return img
+        self.misses["scaled"] += 1
+        img = self.from_atlas(f"{path}@{key[1][0]}x{key[1][1]}")
+        if img is None:
+            img = pg.transform.scale(self.image(path), key[1])
+        self.scaled_images[key] = img
+        return img
+
+    def load(self, path):
+        img = pg.image.load(path)
+        if pg.display.get_surface() is not None:  # 変換には画面の初期化が必要
+            img = img.convert_alpha() if path.endswith(".png") else img.convert()
+        return img
+
+    def from_atlas(self, key):
+        """アトラスにある新しい項目ならシートの一部を返し、なければ None"""
+        if self.atlas is None:
+            self.atlas = self.load_atlas()
+        entry = self.atlas.get(key)
+        if entry is not None:
+            try:
+                st = os.stat(entry["source"])
+            except OSError:
+                st = None
+            if st is None or (st.st_mtime_ns, st.st_size) != (entry["mtime_ns"], entry["bytes"]):
+                entry = None  # 元の画像がアトラスを作った後に変わった
+        if entry is not None and entry["sheet"] not in self.sheets:
+            try:
+                self.sheets[entry["sheet"]] = self.load(entry["sheet"])
+            except (pg.error, OSError):
+                self.sheets[entry["sheet"]] = None
+        sheet = self.sheets.get(entry["sheet"]) if entry is not None else None
+        if sheet is None:
+            self.misses["atlas"] += 1
+            return None
+        self.hits["atlas"] += 1
+        return sheet.subsurface(entry["rect"])
+
+    def load_atlas(self):
+        if self.atlas_index is None or not os.path.exists(self.atlas_index):
+            return {}
+        with open(self.atlas_index) as f:
+            index = json.load(f)
+        if index.get("version") != ATLAS_VERSION:
+            return {}
+        return index["entries"]
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits["font"] += 1
+            return font
+        self.misses["font"] += 1
+        font = pg.font.Font(name, size)
+        self.fonts[key] = font
+        return font
+
+    def text(self, text, size, color, name=None):
+        key = (text, size, color, name)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.hits["text"] += 1
+            self.texts.move_to_end(key)
+            return surface
+        self.misses["text"] += 1
+        surface = self.font(size, name).render(text, True, color)
+        self.texts[key] = surface
+        if len(self.texts) > TEXT_CACHE_SIZE:
+            self.texts.popitem(last=False)
+        return surface
+
+    def stats(self):
+        return {kind: {"hits": self.hits[kind], "misses": self.misses[kind]} for kind in self.hits}
+
+    def clear(self):
+        self.atlas = None
+        self.sheets.clear()
+        self.images.clear()
+        self.scaled_images.clear()
+        self.fonts.clear()
+        self.texts.clear()
+
+
+assets = AssetCache()  # ゲーム全体で共有するキャッシュ
@@ -0,0 +1,204 @@
+"""画面なしで1回のプレイを最後まで自動で進めるオートプレイと、シードの一括実行
+
+play_run は GameSession を決まった方針で動かす。探索では target_policy が
+選んだイベントマスのうち一番近いものへ最短の道（distance.DistanceField）で
+歩き、戦闘は battle_engine の方針関数で行動を選び、強化マスでは buff_policy で
+選ぶ。floors 階層のボスを倒すか、倒れるまで進め、結果を辞書で返す。
+
+sweep は多数のシードを全コアに分散して実行し、終わった順に1シード1行の
+CSVに書き出す。シードごとの結果はワーカーの数によらず同じになる。
+
+今のバランスでは初期ステータスのプレイヤーはボスに勝てないので、--check では
+強いプレイヤー（CHECK_PLAYER）で数階層を進め、ボスを倒して次の階層へ進む道と
+クリアの判定が動くことを確かめる。
+
+    python autoplay.py --seeds 2000 --workers 1 2 4 --out sweep.csv
+    python autoplay.py --player atk=45 hp=300 --floors 2
+    python autoplay.py --check
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+from battle_engine import greedy_policy
+from distance import DistanceField
+from session import DIRECTIONS, END_TURN, MODE_BATTLE, MODE_BUFF, MODE_DEAD, GameSession
+
+HEAL_BELOW = 50  # HPがこれより低いときだけ回復マスへ向かう
+MAX_ACTIONS = 20_000  # 1回のプレイで送る操作の上限（超えたら打ち切る）
+SWEEP_CHUNK = 16  # ワーカーに一度に渡すシードの数
+SWEEP_PATH = "sweep.csv"
+FIELDS = ["seed", "result", "floors", "actions", "moves", "battles", "battle_turns",
+          "hp", "mp", "atk", "def_", "skills"]
+CHECK_SEEDS = range(50)
+CHECK_FLOORS = 3
+CHECK_PLAYER = {"atk": 200, "hp": 1000}  # 回復マスでHPが100に戻っても、ボスに数ターンで勝てる強さ
+
+
+def skill_first_buff(player):
+    # スキルが3つになるまではスキルを増やし、その後はステータスを上げる
+    return 0 if len(player.skills) < 3 else 1
+
+
+def buffs_first_targets(session):
+    # 強化マスを先に取り、回復マスはHPが減ってから使い、残りで戦闘・ボスへ向かう
+    events = session.events
+    for wanted in (("buff",), ("heal",) if session.player.hp < HEAL_BELOW else (), ("battle", "boss")):
+        targets = [pos for pos, kind in events.items() if kind in wanted]
+        if targets:
+            return targets
+    return list(events)
+
+
+def battle_action(session, policy):
+    # 方針関数の選択を GameSession.act の番号に直す
+    choice = policy(session.battle)
+    if choice == "attack":
+        return 0
+    if choice == "end_turn":
+        return END_TURN
+    return session.player.skills.index(choice) + 1
+
+
+def next_route(session, targets):
+    # targets のうち一番近いマスまでの道（次のマスが末尾）
+    return DistanceField(session.maze, targets).path(*session.pos)[::-1]
+
+
+def play_run(seed, floors=1, policy=greedy_policy, buff_policy=skill_first_buff,
+             target_policy=buffs_first_targets, max_actions=MAX_ACTIONS, player_kwargs=None):
+    """seed のプレイを floors 階層のボスを倒すか倒れるまで進め、結果を辞書で返す
+
+    player_kwargs を渡すとプレイヤーの初期ステータスを変える（Player の引数）。
+    """
+    session = GameSession(seed, player_kwargs=player_kwargs)
+    route = []  # 次のイベントマスまでの道（次のマスが末尾）
+    actions = battle_turns = 0
+    result = "timeout"
+    while actions < max_actions:
+        if session.floor.number > floors:
+            result = "cleared"
+            break
+        actions += 1
+        if session.mode == MODE_DEAD:
+            result = "died"
+            break
+        if session.mode == MODE_BATTLE:
+            engine = session.battle
+            if not session.act(battle_action(session, policy)):
+                session.act(END_TURN)
+            if session.battle is None:
+                battle_turns += engine.turns
+        elif session.mode == MODE_BUFF:
+            session.choose_buff(buff_policy(session.player))
+        else:
+            if not route:
+                route = next_route(session, target_policy(session))
+                if not route:
+                    result = "stuck"  # 行けるイベントマスがない
+                    break
+            x, y = route.pop()
+            session.move(DIRECTIONS.index((x - session.pos[0], y - session.pos[1])))
+            if session.pos != (x, y):
+                route = []  # イベントマスを踏んだので、戻ってきたら道を求め直す
+    p = session.player
+    return {"seed": seed, "result": result, "floors": session.floor.number - 1, "actions": actions,
+            "moves": session.moves, "battles": session.battles_won, "battle_turns": battle_turns,
+            "hp": p.hp, "mp": p.mp, "atk": p.atk, "def_": p.def_, "skills": len(p.skills)}
+
+
+def _run_seeds(args):
+    # ワーカープロセス内でシードのまとまりを実行する
+    seeds, floors, player_kwargs = args
+    return [play_run(seed, floors, player_kwargs=player_kwargs) for seed in seeds]
+
+
+def sweep(seeds, path=SWEEP_PATH, workers=None, floors=1, chunk=SWEEP_CHUNK, player_kwargs=None):
+    """seeds を workers プロセスで実行し、終わった順にCSVへ書き出して集計を返す"""
+    workers = workers or os.cpu_count() or 1
+    jobs = [(seeds[i:i + chunk], floors, player_kwargs) for i in range(0, len(seeds), chunk)]
+    counts = {}
+    start = time.perf_counter()
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        if workers == 1:
+            for rows in map(_run_seeds, jobs):
+                _write(writer, f, rows, counts)
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in as_completed([pool.submit(_run_seeds, job) for job in jobs]):
+                    _write(writer, f, future.result(), counts)
+    elapsed = time.perf_counter() - start
+    return {"runs": len(seeds), "results": counts, "seconds": elapsed,
+            "runs_per_sec": len(seeds) / elapsed if elapsed else 0.0}
+
+
+def _write(writer, f, rows, counts):
+    writer.writerows(rows)
+    f.flush()  # 途中で止めても、終わった分はファイルに残る
+    for row in rows:
+        counts[row["result"]] = counts.get(row["result"], 0) + 1
+
+
+def check(seeds=CHECK_SEEDS, floors=CHECK_FLOORS, player_kwargs=CHECK_PLAYER):
+    """強いプレイヤーで floors 階層を進め、クリアできなかったシードの説明のリストを返す"""
+    failures = []
+    for seed in seeds:
+        row = play_run(seed, floors, player_kwargs=player_kwargs)
+        if row["result"] != "cleared" or row["floors"] != floors:
+            failures.append(f"seed {seed}: {row['result']} after {row['floors']} floors")
+        elif play_run(seed, floors, player_kwargs=player_kwargs) != row:
+            failures.append(f"seed {seed}: a second run gave a different result")
+    return failures
+
+
+def parse_player(items):
+    # ["atk=45", "hp=300"] -> {"atk": 45, "hp": 300}
+    player_kwargs = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key not in ("atk", "def_", "hp", "mp") or not value.lstrip("-").isdigit():
+            raise argparse.ArgumentTypeError(f"expected atk/def_/hp/mp=<int>, got {item!r}")
+        player_kwargs[key] = int(value)
+    return player_kwargs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="オートプレイでシードを一括実行する")
+    parser.add_argument("--seeds", type=int, default=2000, help="実行するシードの数（0から）")
+    parser.add_argument("--floors", type=int, default=1, help="この階層のボスを倒したらクリア")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="ワーカーの数（複数指定するとそれぞれで測って比べる）")
+    parser.add_argument("--out", default=SWEEP_PATH, help="結果のCSV（ワーカー数ごとに上書き）")
+    parser.add_argument("--player", nargs="+", default=[], metavar="STAT=VALUE",
+                        help="プレイヤーの初期ステータス（例: atk=45 hp=300）")
+    parser.add_argument("--check", action="store_true",
+                        help="強いプレイヤーで階層の移動とクリアの判定を確かめる")
+    args = parser.parse_args()
+    try:
+        player_kwargs = parse_player(args.player)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    if args.check:
+        failures = check()
+        for line in failures:
+            print(f"FAIL {line}")
+        if not failures:
+            print(f"{len(CHECK_SEEDS)} seeds cleared {CHECK_FLOORS} floors with {CHECK_PLAYER}")
+        return 1 if failures else 0
+
+    seeds = list(range(args.seeds))
+    for workers in args.workers:
+        stats = sweep(seeds, args.out, workers, args.floors, player_kwargs=player_kwargs)
+        results = ", ".join(f"{name} {count}" for name, count in sorted(stats["results"].items()))
+        print(f"workers {workers}: {stats['runs']} runs in {stats['seconds']:.2f} s "
+              f"= {stats['runs_per_sec']:.0f} runs/s ({results})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""NumPyによる戦闘バランスのモンテカルロ推定
+
+battle_engine.BattleEngine と同じルールを、戦闘ごとのステータスを
+配列で持つことで大量の戦闘に対して一括で解決する。プレイヤーの行動は
+battle_engine.greedy_policy と同じく「使えるスキルを全部使ってから通常攻撃」
+（スキルは skill_pool の順に試す）。
+"""
+import sys
+import time
+
+import numpy as np
+
+from entities import ENEMY_ARCHETYPES, Boss, skill_pool
+
+# skill_pool の並びに対応するスキル番号
+BOOST_ATTACK, BOOST_DEFENSE, INCREASE_DAMAGE, DOUBLE_STRIKE, LIFE_STEAL, NULLIFY_SKILL = range(6)
+# Double Strike / Life Steal / Nullify Skill はフラグを立てるだけで戦闘の結果を変えないので、マナだけ消費する
+MANA_COSTS = np.array([skill.mana_cost for skill in skill_pool], dtype=np.int32)
+
+DEFAULT_PROFILES = [
+    {"name": "start", "atk": 10, "def_": 5, "mp": 20, "hp": 100, "n_skills": 1},
+    {"name": "mid", "atk": 16, "def_": 8, "mp": 30, "hp": 120, "n_skills": 2},
+    {"name": "late", "atk": 25, "def_": 12, "mp": 40, "hp": 150, "n_skills": 3},
+]
+
+
+def archetypes():
+    """(名前, atk, def_, hp, スキル数) の一覧を返す"""
+    rows = [(name, stats["atk"], stats["def_"], stats["hp"], 2)  # 敵は2つのスキルを持つ
+            for name, stats in ENEMY_ARCHETYPES.items()]
+    boss = Boss()
+    rows.append(("boss", boss.atk, boss.def_, boss.hp, len(boss.skills)))
+    return rows
+
+
+def _sample_distinct(rng, n, k):
+    # 戦闘ごとに skill_pool から重複なしで k 個選ぶ
+    return np.argsort(rng.random((n, len(skill_pool))), axis=1)[:, :k].astype(np.int8)
+
+
+class BattleBatch:
+    """n 戦闘分の状態を配列で持つ"""
+
+    def __init__(self, n, profile, enemy, rng):
+        _, e_atk, e_def, e_hp, e_n_skills = enemy
+        self.rng = rng
+        self.p_hp = np.full(n, profile["hp"], dtype=np.int32)
+        self.p_atk = np.full(n, profile["atk"], dtype=np.int32)
+        self.p_def = np.full(n, profile["def_"], dtype=np.int32)
+        self.p_mp = np.full(n, profile["mp"], dtype=np.int32)
+        # 所持スキル（バフマスでの追加は重複しうるので復元抽出）
+        owned = rng.integers(0, len(skill_pool), size=(n, profile.get("n_skills", 1)))
+        self.p_skills = np.zeros((n, len(skill_pool)), dtype=bool)
+        np.put_along_axis(self.p_skills, owned, True, axis=1)
+
+        self.e_hp = np.full(n, e_hp, dtype=np.int32)
+        self.e_atk = np.full(n, e_atk, dtype=np.int32)
+        self.e_def = np.full(n, e_def, dtype=np.int32)
+        self.e_skills = _sample_distinct(rng, n, e_n_skills)
+        self.e_prev = np.full(n, -1, dtype=np.int8)
+        self.is_boss = enemy[0] == "boss"
+
+        self.turns = np.zeros(n, dtype=np.int32)
+        self.active = np.ones(n, dtype=bool)
+
+    def apply_player_skill(self, mask, skill):
+        self.p_mp[mask] -= MANA_COSTS[skill]
+        if skill == BOOST_ATTACK:
+            self.p_atk[mask] += 5
+        elif skill == BOOST_DEFENSE:
+            self.p_def[mask] += 5
+        elif skill == INCREASE_DAMAGE:
+            self.e_def[mask] = np.maximum(0, self.e_def[mask] - 5)
+
+    def apply_enemy_skill(self, mask, skills):
+        self.e_atk += np.where(mask & (skills == BOOST_ATTACK), 5, 0).astype(np.int32)
+        self.e_def += np.where(mask & (skills == BOOST_DEFENSE), 5, 0).astype(np.int32)
+        weaken = mask & (skills == INCREASE_DAMAGE)
+        self.p_def[weaken] = np.maximum(0, self.p_def[weaken] - 5)
+
+    def player_turn(self):
+        for skill in range(len(skill_pool)):
+            usable = self.active & self.p_skills[:, skill] & (self.p_mp >= MANA_COSTS[skill])
+            if usable.any():
+                self.apply_player_skill(usable, skill)
+
+        # 通常攻撃（enemy.take_damage）
+        a = self.active
+        self.e_hp[a] -= np.maximum(0, self.p_atk[a] - self.e_def[a])
+        self.active &= self.e_hp > 0
+
+    def enemy_turn(self):
+        a = self.active
+        n, k = self.e_skills.shape
+        if self.is_boss:
+            extra = self.e_skills[np.arange(n), self.rng.integers(0, k, size=n)]
+            self.apply_enemy_skill(a, extra)
+
+        # 前のターンと違うスキルを一様に選ぶ
+        candidates = self.e_skills != self.e_prev[:, None]
+        counts = candidates.sum(axis=1)
+        pick = (self.rng.random(n) * counts).astype(np.int32)
+        column = np.argmax(np.cumsum(candidates, axis=1) > pick[:, None], axis=1)
+        skills = self.e_skills[np.arange(n), column]
+        self.apply_enemy_skill(a, skills)
+        self.e_prev[a] = skills[a]
+
+        # 通常攻撃（プレイヤーは防御力で軽減しない）
+        self.p_hp[a] = np.maximum(0, self.p_hp[a] - self.e_atk[a])
+        self.turns[a] += 1
+        self.active &= self.p_hp > 0
+
+    def compact(self):
+        # 決着した戦闘を配列から外し、以降のターンは続いている戦闘だけを計算する
+        keep = self.active
+        for name in STATE_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+
+    def run(self, max_turns=1000):
+        n = len(self.active)
+        won = np.zeros(n, dtype=bool)
+        turns = np.zeros(n, dtype=np.int32)
+        self.index = np.arange(n)
+        for _ in range(max_turns):
+            if not self.active.any():
+                break
+            self.player_turn()
+            self.enemy_turn()
+            if self.active.sum() * 2 < len(self.active):
+                done = ~self.active
+                won[self.index[done]] = self.e_hp[done] <= 0
+                turns[self.index[done]] = self.turns[done]
+                self.compact()
+        won[self.index] = (self.p_hp > 0) & (self.e_hp <= 0)
+        turns[self.index] = self.turns
+        return won, turns
+
+
+# 戦闘ごとの状態を持つ配列（compact で一緒に間引く）
+STATE_ARRAYS = ["p_hp", "p_atk", "p_def", "p_mp", "p_skills",
+                "e_hp", "e_atk", "e_def", "e_skills", "e_prev",
+                "turns", "active", "index"]
+
+
+def estimate(profile, enemy, n_fights=1_000_000, seed=0, batch_size=1_000_000, max_turns=1000):
+    """1つのプレイヤー × 敵の組み合わせについて勝率とターン数を推定する"""
+    rng = np.random.default_rng(seed)
+    wins = 0
+    turns = []
+    done = 0
+    while done < n_fights:
+        size = min(batch_size, n_fights - done)
+        won, t = BattleBatch(size, profile, enemy, rng).run(max_turns)
+        wins += int(won.sum())
+        turns.append(t)
+        done += size
+    turns = np.concatenate(turns)
+    return {"profile": profile["name"], "enemy": enemy[0], "fights": n_fights,
+            "win_rate": wins / n_fights,
+            "mean_turns": float(turns.mean()),
+            "p50_turns": float(np.percentile(turns, 50)),
+            "p90_turns": float(np.percentile(turns, 90))}
+
+
+def balance_table(profiles=DEFAULT_PROFILES, n_fights=1_000_000, seed=0):
+    """全プレイヤープロファイル × 全敵アーキタイプの表（辞書のリスト）を返す"""
+    return [estimate(profile, enemy, n_fights, seed + i)
+            for i, (profile, enemy) in enumerate((p, e) for p in profiles for e in archetypes())]
+
+
+def format_table(rows):
+    lines = [f"{'profile':<8}{'enemy':<10}{'win':>8}{'turns':>8}{'p50':>6}{'p90':>6}"]
+    for r in rows:
+        lines.append(f"{r['profile']:<8}{r['enemy']:<10}{r['win_rate']:>8.3f}"
+                     f"{r['mean_turns']:>8.2f}{r['p50_turns']:>6.0f}{r['p90_turns']:>6.0f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    start = time.perf_counter()
+    table = balance_table(n_fights=n)
+    elapsed = time.perf_counter() - start
+    print(format_table(table))
+    print(f"{len(table) * n} fights in {elapsed:.2f}s")
@@ -0,0 +1,233 @@
+"""pygameに依存しない戦闘エンジン
+
+戦闘ルール（行動の可否、スキル、敵のターン、勝利報酬）だけを持ち、
+描画や入力は一切行わない。pygameの戦闘画面はこのエンジンの上に乗る薄い
+フロントエンドで、バランス調整用のシミュレーションは画面なしで直接回す。
+"""
+import os
+import random
+import sys
+import time
+
+from entities import Boss, Player, Skill, generate_boss, spawn_enemy
+
+VICTORY_STATS = ["atk", "def_", "hp", "mp"]  # 勝利時に上昇するステータス候補
+
+
+class BattleEngine:
+    """1回の戦闘の状態とルール
+
+    プレイヤーのターンでは player_action に "attack"・Skill・"end_turn" を
+    渡し、敵のターンでは enemy_turn を呼ぶ。logs に None を渡すと
+    ログ文字列を作らないのでシミュレーション時に速い。enemy_ai（enemy_ai.ExpectimaxAI
+    など）を渡すと敵のスキルを探索で選び、None ならランダムに選ぶ。
+    """
+
+    def __init__(self, player, enemy, logs=None, rng=random, enemy_ai=None):
+        self.player = player
+        self.enemy = enemy
+        self.logs = logs  # 戦闘ログ（Noneなら記録しない）
+        self.rng = rng
+        self.enemy_ai = enemy_ai
+        self.is_player_turn = True
+        self.used_actions = {"attack": False, "skills": set()}  # 使用済みアクションを追跡
+        self.turns = 0  # 敵のターンを終えた回数
+
+    def log(self, txt):
+        if self.logs is not None:
+            self.logs.append(txt)
+
+    def is_over(self):
+        return self.player.hp <= 0 or self.enemy.hp <= 0
+
+    def player_won(self):
+        return self.player.hp > 0 and self.enemy.hp <= 0
+
+    def can_use(self, action):
+        """このターンにまだ選択できる行動かどうか"""
+        if action == "attack":
+            return not self.used_actions["attack"]
+        if isinstance(action, Skill):
+            return action not in self.used_actions["skills"]
+        return action == "end_turn"
+
+    def available_actions(self):
+        actions = [a for a in ["attack"] + self.player.skills if self.can_use(a)]
+        actions.append("end_turn")
+        return actions
+
+    def player_action(self, action):
+        """プレイヤーの行動を1つ処理する。ターンが終わったらTrueを返す"""
+        if not self.can_use(action):
+            return False
+        if action == "attack":
+            self.used_actions["attack"] = True
+            self.enemy.take_damage(self.player.atk)
+            if self.logs is not None:
+                self.log(f"Player attacks! Enemy HP: {self.enemy.hp}")
+        elif isinstance(action, Skill):
+            self.used_actions["skills"].add(action)
+            if not self.player.use_mana(action.mana_cost):
+                self.log("(Failure : This skill requires more mana than you currently have. )")
+            else:
+                action.use(self.player, self.enemy)
+                if self.logs is not None:
+                    self.log(f"Player used {action.name}!  (Player Mana: {self.player.mp} remained)")
+        elif action == "end_turn":
+            self.is_player_turn = False
+            self.used_actions = {"attack": False, "skills": set()}
+            return True
+        return False
+
+    def choose_enemy_skill(self):
+        # 前のターンと同じスキルは選ばない（候補がなければ全スキルから選ぶ）
+        if self.enemy_ai is not None:
+            return self.enemy_ai.choose(self)
+        enemy = self.enemy
+        candidates = [s for s in enemy.skills if s.name != enemy.previous_skill]
+        return self.rng.choice(candidates or enemy.skills)
+
+    def use_enemy_skill(self, skill):
+        skill.use(self.enemy, self.player)
+        return f"{self.enemy_name()} used {skill.name}!  "
+
+    def enemy_name(self):
+        return "Boss" if isinstance(self.enemy, Boss) else "Enemy"
+
+    def enemy_turn(self):
+        enemy = self.enemy
+        txt_skill = ""
+        if isinstance(enemy, Boss):
+            # ボスは追加でもう1つスキルを使う
+            txt_skill += self.use_enemy_skill(self.rng.choice(enemy.skills))
+
+        # 敵のスキル使用
+        if enemy.skills:
+            skill = self.choose_enemy_skill()
+            txt_skill += self.use_enemy_skill(skill)
+            enemy.previous_skill = skill.name  # このターンで使ったスキルに更新
+
+        # 通常攻撃
+        enemy.normal_attack(self.player)
+        if self.logs is not None:
+            self.log(txt_skill + f"{self.enemy_name()} attacks! Player HP: {self.player.hp}")
+        self.turns += 1
+        self.is_player_turn = True
+
+    def step(self, action=None):
+        """手番に応じて1手進める。プレイヤーの手番ではactionが必要"""
+        if self.is_player_turn:
+            return self.player_action(action)
+        self.enemy_turn()
+        return True
+
+    def grant_victory_reward(self):
+        """勝利時にランダムなステータスを上昇させ、上昇したステータス名を返す"""
+        stat_to_increase = self.rng.choice(VICTORY_STATS)
+        player = self.player
+        if stat_to_increase == "atk":
+            player.atk += 3
+            self.log("Your Attack increased by 3!")
+        elif stat_to_increase == "def_":
+            player.def_ += 3
+            self.log("Your Defense increased by 3!")
+        elif stat_to_increase == "hp":
+            player.hp += 10
+            self.log("Your HP increased by 10!")
+        elif stat_to_increase == "mp":
+            player.mp += 5
+            self.log("Your MP increased by 5!")
+        return stat_to_increase
+
+
+# プレイヤーの行動方針（engineを受け取り、次の行動を返す関数）
+def attack_only_policy(engine):
+    return "attack" if engine.can_use("attack") else "end_turn"
+
+
+def greedy_policy(engine):
+    # 使えるスキルをすべて使ってから通常攻撃する
+    for skill in engine.player.skills:
+        if engine.can_use(skill) and engine.player.mp >= skill.mana_cost:
+            return skill
+    return attack_only_policy(engine)
+
+
+def run_battle(player, enemy, policy=greedy_policy, rng=random, max_turns=1000, logs=None, enemy_ai=None):
+    """画面なしで1戦闘を最後まで進め、結果を辞書で返す"""
+    engine = BattleEngine(player, enemy, logs=logs, rng=rng, enemy_ai=enemy_ai)
+    actions = 0
+    while not engine.is_over() and engine.turns < max_turns:
+        if engine.is_player_turn:
+            engine.player_action(policy(engine))
+            actions += 1
+        else:
+            engine.enemy_turn()
+    won = engine.player_won()
+    if won:
+        engine.grant_victory_reward()
+    return {"won": won, "turns": engine.turns, "actions": actions,
+            "player_hp": player.hp, "enemy_hp": enemy.hp}
+
+
+def random_enemy(rng=random):
+    return spawn_enemy(rng=rng)
+
+
+def _run_chunk(args):
+    # ワーカープロセス内で count 回の戦闘を行い、集計だけを返す
+    count, seed, enemy_factory, policy, player_kwargs, max_turns = args
+    rng = random.Random(seed)
+    wins = turns = 0
+    for _ in range(count):
+        player = Player(rng=rng, **player_kwargs)
+        result = run_battle(player, enemy_factory(rng), policy, rng, max_turns)
+        wins += result["won"]
+        turns += result["turns"]
+    return count, wins, turns
+
+
+def simulate_battles(n_battles, enemy_factory=random_enemy, policy=greedy_policy,
+                     player_kwargs=None, workers=None, seed=0, max_turns=1000):
+    """n_battles 回の戦闘を全コアに分散して実行し、勝率と平均ターン数を返す
+
+    enemy_factory と policy はプロセス間で受け渡すためモジュールの
+    トップレベル関数である必要がある。
+    """
+    workers = workers or os.cpu_count() or 1
+    player_kwargs = player_kwargs or {}
+    n_chunks = min(n_battles, workers * 4) or 1
+    jobs = []
+    for i in range(n_chunks):
+        count = n_battles // n_chunks + (1 if i < n_battles % n_chunks else 0)
+        jobs.append((count, seed * 1000003 + i, enemy_factory, policy, player_kwargs, max_turns))
+
+    if workers == 1:
+        results = map(_run_chunk, jobs)
+        total, wins, turns = _sum_chunks(results)
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # 起動を遅くしないよう、使うときだけ読み込む
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            total, wins, turns = _sum_chunks(pool.map(_run_chunk, jobs))
+    return {"battles": total, "wins": wins,
+            "win_rate": wins / total if total else 0.0,
+            "mean_turns": turns / total if total else 0.0}
+
+
+def _sum_chunks(results):
+    total = wins = turns = 0
+    for count, w, t in results:
+        total += count
+        wins += w
+        turns += t
+    return total, wins, turns
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for name, factory in [("enemy", random_enemy), ("boss", generate_boss)]:
+        start = time.perf_counter()
+        stats = simulate_battles(n, enemy_factory=factory)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {stats['battles']} battles, win rate {stats['win_rate']:.3f}, "
+              f"mean turns {stats['mean_turns']:.2f} ({elapsed / stats['battles'] * 1e6:.1f} us/battle)")
@@ -0,0 +1,75 @@
+"""上限付きの戦闘ログと、ファイルへの書き出しスレッド
+
+画面に出すのは直近の数行だけなので、戦闘ログは最大 LOG_LINES 行の
+リングバッファに持つ。全文を残したいときは LogWriter を渡すと、
+行をキューに入れるだけで、別スレッドがまとめて追記する（描画側は
+ファイルに触らない）。ファイルは1行1ログのテキストで、戦闘の区切りに
+"# " で始まる行を入れる。
+"""
+import queue
+import threading
+from collections import deque
+
+LOG_LINES = 64  # メモリに残す行数
+
+
+class BattleLog:
+    def __init__(self, size=LOG_LINES, writer=None, title=None):
+        self.lines = deque(maxlen=size)
+        self.writer = writer
+        if writer is not None and title is not None:
+            writer.write(f"# {title}")
+
+    def append(self, txt):
+        self.lines.append(txt)
+        if self.writer is not None:
+            self.writer.write(txt)
+
+    def tail(self, n):
+        """最新の n 行（古い順）"""
+        return list(self.lines)[-n:]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+
+class LogWriter:
+    """ログの行をバックグラウンドでファイルに追記する"""
+
+    def __init__(self, path, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size  # 1回の書き込みでまとめる最大行数
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="battle-log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                batch = [self.queue.get()]  # 1行来るまで眠る
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                done = None in batch
+                if done:
+                    batch = batch[:batch.index(None)]
+                if batch:
+                    f.write("\n".join(batch) + "\n")
+                    f.flush()
+                    self.written += len(batch)
+                if done:
+                    return
+
+    def close(self):
+        """残りの行を書き終えるまで待つ"""
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,90 @@
+"""エンティティのメモリと生成コストのマイクロベンチマーク
+
+1体あたりのメモリ（tracemalloc）と、戦闘マスを踏んだときの敵の生成時間を
+従来の辞書ベースのクラス・__slots__ のクラス・EntityPool で比較する。
+
+    python benchmarks/bench_entities.py [体数]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import ENEMY_ARCHETYPES, Enemy, skill_pool, spawn_enemy  # noqa: E402
+from entity_pool import EntityPool  # noqa: E402
+
+
+class DictEnemy:
+    # 比較用：__slots__ のない従来の敵クラス
+    def __init__(self, atk, def_, hp, rng=random):
+        self.atk = atk
+        self.def_ = def_
+        self.hp = hp
+        self.skills = rng.sample(skill_pool, 2)
+        self.previous_skill = None
+        self.next_attack_double = False
+        self.next_attack_heal = False
+        self.nullify_next_skill = False
+
+
+def legacy_encounter(rng):
+    # 従来の戦闘マス：5体すべて生成して1体だけ使う
+    return rng.choice([DictEnemy(rng=rng, **stats) for stats in ENEMY_ARCHETYPES.values()])
+
+
+def memory_per_entity(build, n):
+    rng = random.Random(0)
+    tracemalloc.start()
+    keep = build(n, rng)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return size / n
+
+
+def time_per_call(func, n):
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(n):
+        func(rng)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    stats = ENEMY_ARCHETYPES["balanced"]
+
+    def build_pool(count, rng):
+        pool = EntityPool()
+        for _ in range(count):
+            pool.spawn_enemy("balanced", rng)
+        return pool
+
+    memory = [
+        ("dict class", memory_per_entity(lambda c, r: [DictEnemy(rng=r, **stats) for _ in range(c)], n)),
+        ("__slots__", memory_per_entity(lambda c, r: [Enemy(rng=r, **stats) for _ in range(c)], n)),
+        ("EntityPool", memory_per_entity(build_pool, n)),
+    ]
+    print(f"memory per entity ({n} entities)")
+    for name, size in memory:
+        print(f"  {name:<12}{size:>8.1f} bytes  ({memory[0][1] / size:.1f}x smaller)")
+
+    pool = EntityPool(capacity=1)
+    encounters = [
+        ("5 dict objects + choice", legacy_encounter),
+        ("spawn_enemy", lambda rng: spawn_enemy(rng=rng)),
+        ("EntityPool.spawn_enemy", lambda rng: pool.remove(pool.spawn_enemy(rng=rng))),
+    ]
+    print("cost per battle-tile encounter")
+    base = None
+    for name, func in encounters:
+        us = time_per_call(func, n)
+        base = base or us
+        print(f"  {name:<24}{us:>8.2f} us  ({base / us:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
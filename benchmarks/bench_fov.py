@@ -0,0 +1,69 @@
+"""視界の計算コストのベンチマーク
+
+迷路の大きさと視界の半径を変えて、プレイヤーをランダムに歩かせながら
+1歩あたりの視界の計算時間（位置ごとの覚えなし）と、見え方が変わって
+描き直すマスの数を測る。比較として、毎フレーム迷路全体の状態を
+作り直した場合に触るマスの数（迷路全体）も出す。計算時間は半径で決まり、
+迷路の大きさによらないはず。通路の迷路では壁ですぐ遮られるので、半径が
+効いてくる例として、柱が並んだだけの広い部屋（pillars）も測る。
+
+    python benchmarks/bench_fov.py [歩数]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fov import FieldOfView  # noqa: E402
+from maze import PATH, WALL, MazeGrid, generate_maze, move_player  # noqa: E402
+from maze_algorithms import generate_maze_kruskal  # noqa: E402
+
+SIZES = [11, 101, 1001]
+RADII = [4, 8, 16, 32]
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+def pillars(width, height, rng=random):
+    # 外周が壁で、4マスおきに柱が立っている広い部屋
+    room = MazeGrid(width, height, PATH)
+    for y in range(height):
+        for x in range(width):
+            if x in (0, width - 1) or y in (0, height - 1) or (x % 4 == 0 and y % 4 == 0):
+                room[y][x] = WALL
+    return room
+
+
+def walk_path(maze, steps, rng):
+    # 実際に位置が変わった歩だけを集める
+    pos, path = (1, 1), []
+    while len(path) < steps:
+        new = move_player(pos, rng.choice(DIRECTIONS), maze, {})
+        if new != pos:
+            path.append(new)
+            pos = new
+    return path
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'maze':<12}{'size':>11}{'radius':>8}{'us/step':>10}{'visible':>9}{'changed':>9}{'full grid':>11}")
+    for name, generate in (("backtracker", generate_maze), ("kruskal", generate_maze_kruskal), ("pillars", pillars)):
+        for size in SIZES:
+            maze = generate(size, size, random.Random(0))
+            path = walk_path(maze, steps, random.Random(1))
+            for radius in RADII:
+                fov = FieldOfView(maze, radius, cache_size=0)
+                visible = changed = 0
+                start = time.perf_counter()
+                for pos in path:
+                    changed += len(fov.update(pos))
+                    visible += len(fov.visible)
+                elapsed = time.perf_counter() - start
+                print(f"{name:<12}{f'{size}x{size}':>11}{radius:>8}{elapsed / steps * 1e6:>10.1f}"
+                      f"{visible / steps:>9.1f}{changed / steps:>9.1f}{size * size:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""迷路・配置・移動の関数のベンチマークと性能の退行チェック
+
+generate_maze・generate_event_tiles・spawn_boss_tile（初期位置を渡すときと渡さないとき）・
+get_random_start・
+move_player を、迷路の大きさとイベントの密度（道マスのうちイベントのある
+マスの割合）の組み合わせごとに、固定したシードで測る。結果は ops/sec と、
+1回の呼び出しで確保したメモリのピーク（tracemalloc）。同じ処理でもプロセスごとに
+速さが20〜40%ずれることがあるので、全体を --processes 個の別プロセスで測り、
+プロセスごとの値の中央値を使う。
+
+--save で結果をJSONの基準値として保存し、次からは基準値と比べて
+ops/sec が --threshold（既定 20%）より下がったか、メモリのピークがそれより
+増えた項目があれば終了コード1で終わる。基準値は測ったマシンに依存するので、
+別のマシンでは先に --save で作り直す。
+
+    python benchmarks/bench_generators.py --save
+    python benchmarks/bench_generators.py --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maze import generate_maze, move_player  # noqa: E402
+from placement import generate_event_tiles, get_random_start, spawn_boss_tile  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generators_baseline.json")
+SIZES = [11, 101, 501]
+DENSITIES = [0.0, 0.5, 0.99]
+EVENT_TYPES = ["battle", "heal", "buff"]
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+MOVES = 1000  # move_player は1回の計測でこの歩数を歩く
+MIN_TIME = 0.05  # 1回の計測にかける最短の秒数
+MEMORY_SLACK = 1024  # メモリのピークはこのバイト数までの増加は退行とみなさない
+
+
+def fill_events(maze, density, rng):
+    # 道マスのうち density の割合にランダムな種類のイベントを置く
+    cells = [(x, y) for y, row in enumerate(maze) for x, v in enumerate(row) if v == 0]
+    return {cell: rng.choice(EVENT_TYPES) for cell in rng.sample(cells, int(len(cells) * density))}
+
+
+def cases(sizes, densities, seed):
+    """(名前, 1回分の処理, 1回あたりの操作数) を返す。処理は毎回同じシードから始める"""
+    for size in sizes:
+        yield f"generate_maze/{size}", lambda size=size: generate_maze(size, size, random.Random(seed)), 1
+        maze = generate_maze(size, size, random.Random(seed))
+        yield (f"generate_event_tiles/{size}",
+               lambda maze=maze: generate_event_tiles(maze, random.Random(seed)), 1)
+        for density in densities:
+            events = fill_events(maze, density, random.Random(seed))
+            tag = f"{size}/{density:g}"
+
+            rng = random.Random(seed)
+            directions = [rng.choice(DIRECTIONS) for _ in range(MOVES)]
+            start = get_random_start(maze, events, rng)
+
+            def boss(maze=maze, events=events):
+                del events[spawn_boss_tile(maze, events, random.Random(seed))]  # 次の呼び出しのために戻す
+
+            def boss_far(maze=maze, events=events, start=start):
+                # ゲームと同じく初期位置を渡す（迷路全体の道のりを求めて遠いマスから選ぶ）
+                del events[spawn_boss_tile(maze, events, random.Random(seed), start)]
+
+            yield f"spawn_boss_tile/{tag}", boss, 1
+            yield f"spawn_boss_tile_far/{tag}", boss_far, 1
+            yield (f"get_random_start/{tag}",
+                   lambda maze=maze, events=events: get_random_start(maze, events, random.Random(seed)), 1)
+
+            def walk(maze=maze, events=events, directions=directions, start=start):
+                pos = start
+                for direction in directions:
+                    result = move_player(pos, direction, maze, events)
+                    if not isinstance(result[0], str):  # イベントマスでは動かずに次の方向へ
+                        pos = result
+
+            yield f"move_player/{tag}", walk, MOVES
+
+
+def measure(func, ops, repeat):
+    # timeit で MIN_TIME 秒以上かかる回数を決め、repeat 回の計測の中央値を使う（GCは止める）。
+    # 最良値はたまたま速かった1回に引きずられるので、基準値には向かない。
+    # メモリは別の1回で測る
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < MIN_TIME:
+        number *= 2
+    seconds = statistics.median(timer.repeat(repeat, number)) / number
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": ops / seconds, "peak_bytes": peak}
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            found.append(f"{name}: {base['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f} ops/sec")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold) + MEMORY_SLACK:
+            found.append(f"{name}: {base['peak_bytes']} -> {result['peak_bytes']} peak bytes")
+    return found
+
+
+def run_cases(args):
+    return {name: measure(func, ops, args.repeat) for name, func, ops in cases(args.sizes, args.densities, args.seed)}
+
+
+def run_processes(args):
+    # 自分自身を --worker で起動し、各プロセスの結果の中央値をとる
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--seed", str(args.seed),
+               "--repeat", str(args.repeat), "--sizes", *map(str, args.sizes),
+               "--densities", *map(str, args.densities)]
+    runs = []
+    for i in range(args.processes):
+        print(f"process {i + 1}/{args.processes}", file=sys.stderr, flush=True)
+        runs.append(json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout))
+    return {name: {"ops_per_sec": statistics.median(run[name]["ops_per_sec"] for run in runs),
+                   "peak_bytes": max(run[name]["peak_bytes"] for run in runs)}
+            for name in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--densities", nargs="+", type=float, default=DENSITIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="プロセスごとの計測の回数（中央値を使う）")
+    parser.add_argument("--processes", type=int, default=3, help="測るプロセスの数（中央値を使う）")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="結果を基準値として保存する")
+    parser.add_argument("--threshold", type=float, default=0.2, help="退行とみなす悪化の割合")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        json.dump(run_cases(args), sys.stdout)
+        return 0
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = run_processes(args)
+    print(f"{'case':<32}{'ops/sec':>14}{'peak [KB]':>12}{'vs base':>10}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%}" if base else ""
+        print(f"{name:<32}{result['ops_per_sec']:>14.0f}{result['peak_bytes'] / 1024:>12.1f}{change:>10}")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "seed": args.seed, "results": results}, f, indent=1)
+        print(f"saved baseline to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"no baseline at {args.baseline} (run with --save)")
+        return 0
+    found = regressions(results, baseline, args.threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""迷路生成のベンチマーク
+
+サイズごとに generate_maze の生成時間とピークメモリ（tracemalloc）を表示する。
+--legacy を付けると、従来のリストのリスト実装とも比較する。
+
+    python benchmarks/bench_maze.py 501 1001 2001 4001
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maze import generate_maze  # noqa: E402
+
+
+def generate_maze_lists(width, height, rng=random):
+    # 比較用：リストのリストと共有の方向リストを毎回シャッフルする従来の実装
+    maze = [[1 for _ in range(width)] for _ in range(height)]
+    stack = [(1, 1)]
+    maze[1][1] = 0
+    directions = [(-2, 0), (2, 0), (0, -2), (0, 2)]
+    while stack:
+        x, y = stack[-1]
+        rng.shuffle(directions)
+        for dx, dy in directions:
+            nx, ny = x + dx, y + dy
+            if 0 < nx < width and 0 < ny < height and maze[ny][nx] == 1:
+                maze[ny][nx] = 0
+                maze[y + dy // 2][x + dx // 2] = 0
+                stack.append((nx, ny))
+                break
+        else:
+            stack.pop()
+    return maze
+
+
+def measure(func, size, seed):
+    # 時間は計測なしで、ピークメモリは tracemalloc を有効にした別の実行で測る
+    start = time.perf_counter()
+    func(size, size, random.Random(seed))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(size, size, random.Random(seed))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[501, 1001, 2001, 4001])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", action="store_true", help="従来実装とも比較する")
+    args = parser.parse_args()
+
+    backends = [("bytearray", generate_maze)]
+    if args.legacy:
+        backends.append(("lists", generate_maze_lists))
+
+    print(f"{'backend':<10}{'size':>12}{'time [s]':>12}{'peak [MB]':>12}")
+    for size in args.sizes:
+        for name, func in backends:
+            elapsed, peak = measure(func, size, args.seed)
+            print(f"{name:<10}{f'{size}x{size}':>12}{elapsed:>12.3f}{peak / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
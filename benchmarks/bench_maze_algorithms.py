@@ -0,0 +1,100 @@
+"""迷路生成アルゴリズムの比較
+
+maze_algorithms の各アルゴリズムで迷路を作り、生成の速さ（セル/秒）、
+メモリのピーク（tracemalloc）と、迷路の性質として行き止まりの割合と
+最長の道（木の直径、マス数）を表示する。eller (stream) は eller_rows の行を
+迷路全体を持たずにそのままファイルへ書いた場合。
+
+    python benchmarks/bench_maze_algorithms.py 101 501 1001
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maze import PATH  # noqa: E402
+from maze_algorithms import MAZE_ALGORITHMS, eller_rows  # noqa: E402
+
+
+def dead_ends(maze):
+    # 道マスのうち、上下左右の道が1つだけのマスの数
+    cells, width = maze.cells, maze.width
+    count = 0
+    for i in range(width, len(cells) - width):
+        if cells[i] == PATH:
+            around = (cells[i - 1] == PATH) + (cells[i + 1] == PATH) \
+                + (cells[i - width] == PATH) + (cells[i + width] == PATH)
+            count += around == 1
+    return count
+
+
+def farthest(maze, start):
+    # 幅優先探索で start から最も遠い道マスとその距離を返す
+    cells, width = maze.cells, maze.width
+    dist = array("i", [-1]) * len(cells)
+    dist[start] = 0
+    queue = deque([start])
+    far = start
+    while queue:
+        i = queue.popleft()
+        far = i
+        d = dist[i] + 1
+        for j in (i - 1, i + 1, i - width, i + width):
+            if cells[j] == PATH and dist[j] < 0:
+                dist[j] = d
+                queue.append(j)
+    return far, dist[far]
+
+
+def longest_path(maze):
+    # ループのない迷路なので、任意のマスから最も遠いマスを2回たどれば直径になる
+    far, _ = farthest(maze, maze.width + 1)
+    _, length = farthest(maze, far)
+    return length
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def stream_to_file(size, seed, path):
+    with open(path, "wb") as f:
+        for row in eller_rows(size, size, random.Random(seed)):
+            f.write(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[101, 501, 1001])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.gettempdir(), "bench_maze_algorithms.bin")
+
+    print(f"{'algorithm':<16}{'size':>12}{'Mcells/s':>10}{'peak [MB]':>11}{'dead ends':>11}{'longest':>10}")
+    for size in args.sizes:
+        rooms = (size // 2) ** 2
+        for name, generate in MAZE_ALGORITHMS.items():
+            maze, elapsed, peak = measure(generate, size, size, random.Random(args.seed))
+            print(f"{name:<16}{f'{size}x{size}':>12}{size * size / elapsed / 1e6:>10.2f}{peak / 2**20:>11.2f}"
+                  f"{dead_ends(maze) / rooms:>11.1%}{longest_path(maze):>10}")
+        _, elapsed, peak = measure(stream_to_file, size, args.seed, path)
+        print(f"{'eller (stream)':<16}{f'{size}x{size}':>12}{size * size / elapsed / 1e6:>10.2f}{peak / 2**20:>11.2f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""セーブデータの大きさと保存・読み込み時間のベンチマーク
+
+迷路の大きさを変えてスナップショットを作り、バイナリ形式の大きさと
+encode/decode・ファイルへの save/load の時間を測る。比較用に、迷路を
+リストのリストにして pickle した場合の大きさと時間も出す。
+
+    python benchmarks/bench_snapshot.py [繰り返し回数]
+"""
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import Player  # noqa: E402
+from maze import generate_maze  # noqa: E402
+from placement import generate_event_tiles, get_random_start  # noqa: E402
+from snapshot import Snapshot, decode, encode, load, save  # noqa: E402
+
+SIZES = [11, 101, 1001, 2001]
+
+
+def make_snapshot(size):
+    rng = random.Random(0)
+    maze = generate_maze(size, size, rng)
+    events = generate_event_tiles(maze, rng)
+    start = get_random_start(maze, events, rng)
+    floor_rng = random.Random(1)
+    return Snapshot(1, maze, events, start, Player(rng=rng), False, rng.getstate(), floor_rng.getstate())
+
+
+def best_ms(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    path = os.path.join(tempfile.gettempdir(), "bench_snapshot.bin")
+    print(f"{'size':>10}{'bytes':>10}{'encode':>9}{'decode':>9}{'save':>9}{'load':>9}"
+          f"{'pickle B':>11}{'dump':>9}{'loads':>9}   (ms)")
+    for size in SIZES:
+        snapshot = make_snapshot(size)
+        data = encode(snapshot)
+        naive = (snapshot.maze.tolist(), snapshot.events, snapshot.player_pos, snapshot.player,
+                 snapshot.rng_state, snapshot.floor_rng_state)
+        pickled = pickle.dumps(naive)
+        print(f"{f'{size}x{size}':>10}{len(data):>10}"
+              f"{best_ms(lambda: encode(snapshot), repeat):9.2f}"
+              f"{best_ms(lambda: decode(data), repeat):9.2f}"
+              f"{best_ms(lambda: save(path, snapshot), repeat):9.2f}"
+              f"{best_ms(lambda: load(path), repeat):9.2f}"
+              f"{len(pickled):>11}"
+              f"{best_ms(lambda: pickle.dumps(naive), repeat):9.2f}"
+              f"{best_ms(lambda: pickle.loads(pickled), repeat):9.2f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
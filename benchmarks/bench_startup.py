@@ -0,0 +1,76 @@
+"""起動してから最初の画面を描き終えるまでの時間のベンチマーク
+
+新しいプロセスでゲームを起動し、最初のフレームの pg.display.update が
+終わるまでの時間を、アトラスを使う場合と使わない場合で測る（中央値）。
+子プロセスは段階ごとの時刻も返すので、pygame の読み込み・ゲームの
+モジュールの読み込み・画面の初期化・画像の読み込みと最初の描画の内訳も出す。
+アトラスは先に python build_atlas.py で作っておく。
+
+    python benchmarks/bench_startup.py [回数]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子プロセスで koukaton_roguelike.main と同じ順に最初のフレームまで進める
+CHILD = """
+import json, sys, time
+marks = {}
+import pygame as pg
+marks["import pygame"] = time.time()
+import koukaton_roguelike as game
+from assets import assets
+from scenes import SceneManager
+marks["import game"] = time.time()
+if sys.argv[1] == "0":
+    assets.atlas_index = None
+pg.init()
+screen = pg.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+marks["set_mode"] = time.time()
+manager = SceneManager(screen, game.FPS)
+exploration = game.start_game(manager, game.random.Random(0))
+manager.top.draw(screen, manager.ticks())
+marks["first frame"] = time.time()
+exploration.floors.close()
+print(json.dumps({"marks": marks, "atlas": assets.stats()["atlas"]}))
+"""
+
+
+def launch(use_atlas):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.time()
+    out = subprocess.run([sys.executable, "-c", CHILD, "1" if use_atlas else "0"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    previous, stages = start, {}
+    for name, t in result["marks"].items():
+        stages[name] = (t - previous) * 1000
+        previous = t
+    stages["total"] = (result["marks"]["first frame"] - start) * 1000
+    return stages, result["atlas"]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    if not os.path.exists(os.path.join(ROOT, "fig", "atlas.json")):
+        print("fig/atlas.json がありません（python build_atlas.py で作る）")
+    launch(True)  # 1回目はファイルのキャッシュや .pyc の作成を含むので捨てる
+    names = None
+    for use_atlas in (False, True):
+        samples = [launch(use_atlas) for _ in range(runs)]
+        if names is None:
+            names = list(samples[0][0])
+            print(f"{'':>10}" + "".join(f"{name:>15}" for name in names) + "   (ms, median)")
+        medians = [statistics.median(stages[name] for stages, _ in samples) for name in names]
+        atlas = samples[0][1]
+        label = f"atlas {atlas['hits']}/{atlas['hits'] + atlas['misses']}" if use_atlas else "files"
+        print(f"{label:>10}" + "".join(f"{m:15.1f}" for m in medians))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""広いワールドの描画コストとメモリのベンチマーク
+
+ワールドの大きさ（チャンク数）を変えて、プレイヤーを歩かせながら1フレームの
+描画時間とメモリに置かれたチャンク数を測る。どちらもワールドの大きさに
+よらず一定になるはず。
+
+    python benchmarks/bench_world.py [歩数]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+import koukaton_roguelike as game  # noqa: E402
+from scenes import SceneManager  # noqa: E402
+
+
+def walk(world_chunks, steps):
+    screen = pg.display.get_surface()
+    manager = SceneManager(screen, game.FPS)
+    scene = game.start_game(manager, random.Random(0), world_chunks=world_chunks)
+    world = scene.world
+    rng = random.Random(1)
+    directions = list(game.DIRECTIONS.values())
+    frame_times, resident = [], 0
+    for _ in range(steps):
+        result = game.move_player(scene.player_pos, rng.choice(directions), world, scene.events)
+        if isinstance(result[0], str):
+            world.remove_event(result[1], result[2])  # 戦闘などは飛ばしてマスだけ消す
+            result = result[1], result[2]
+        scene.player_pos = result
+        scene.update(0)
+        start = time.perf_counter()
+        scene.draw(screen, 0)
+        frame_times.append(time.perf_counter() - start)
+        resident = max(resident, world.stats()["resident"])
+    frame_times.sort()
+    return frame_times, resident, world
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pg.init()
+    pg.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    print(f"{'chunks':>8}{'cells':>12}{'p50 ms':>9}{'p99 ms':>9}{'resident':>10}{'loads':>7}")
+    for n in (1, 4, 16, 64):
+        times, resident, world = walk(n, steps)
+        p50, p99 = times[len(times) // 2] * 1000, times[len(times) * 99 // 100] * 1000
+        print(f"{f'{n}x{n}':>8}{world.width * world.height:>12}{p50:9.2f}{p99:9.2f}{resident:>10}{world.loads:>7}")
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
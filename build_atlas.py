@@ -0,0 +1,94 @@
+"""画像をまとめたアトラスを前もって作るビルドスクリプト
+
+fig/ の透過PNGのスプライトを1枚のシート（fig/atlas.png）に棚詰めし、
+ゲームで使う大きさに拡大縮小した画像も同じシートに入れておく。背景のような
+不透明な写真はウィンドウの大きさに縮小したものを無圧縮のBMPで別に書き出す
+（JPEGのデコードと縮小が起動時に要らなくなり、画素も実行時の拡大と同じになる）。
+どの画像がどこにあるかは目録 fig/atlas.json に書き、assets.py が起動時に
+読む。元の画像が変わると（更新時刻・大きさで判定）その項目は使われず、
+個別のファイルから読み込むので、作り直すまでは前と同じ動きになる。
+
+    python build_atlas.py
+"""
+import json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg  # noqa: E402
+
+from assets import ATLAS_INDEX, ATLAS_VERSION  # noqa: E402
+from koukaton_roguelike import CELL_SIZE, WINDOW_HEIGHT, WINDOW_WIDTH  # noqa: E402
+
+ATLAS_SHEET = "fig/atlas.png"
+ATLAS_WIDTH = 512  # シートの幅（高さは詰めた結果で決まる）
+PADDING = 1  # 拡大縮小やフィルタで隣の画像がにじまないように空ける
+SKIP = {"fig/screen_shot.png"}  # README用でゲームでは使わない
+
+# ゲームが assets.scaled で求める (パス, 大きさ)
+SCALED = [
+    ("fig/3.png", (CELL_SIZE, CELL_SIZE)),
+    ("fig/3.png", (80, 80)),
+    ("fig/alien1.png", (80, 80)),
+    ("fig/pg_bg.jpg", (WINDOW_WIDTH, WINDOW_HEIGHT)),
+]
+
+
+def source_info(path):
+    st = os.stat(path)
+    return {"source": path, "mtime_ns": st.st_mtime_ns, "bytes": st.st_size}
+
+
+def shelf_pack(sizes, width=ATLAS_WIDTH):
+    """(幅, 高さ) のリストを高い順に棚へ並べ、各位置とシートの高さを返す"""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        positions[i] = (x, y)
+        x += w + PADDING
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+
+def main():
+    pg.display.init()
+    pg.display.set_mode((1, 1))  # convert_alpha に画面が必要
+
+    sprites = {}  # キー -> (元のパス, 画像)
+    for name in sorted(os.listdir("fig")):
+        path = f"fig/{name}"
+        if name.endswith(".png") and path not in SKIP and path != ATLAS_SHEET:
+            sprites[path] = (path, pg.image.load(path).convert_alpha())
+    entries = {}
+    for path, size in SCALED:
+        key = f"{path}@{size[0]}x{size[1]}"
+        img = pg.transform.scale(pg.image.load(path), size)  # 実行時と同じ最近傍の拡大縮小
+        if path.endswith(".png"):
+            sprites[key] = (path, img.convert_alpha())
+        else:
+            sheet = f"fig/atlas_{os.path.splitext(os.path.basename(path))[0]}_{size[0]}x{size[1]}.bmp"
+            pg.image.save(img, sheet)
+            entries[key] = {"sheet": sheet, "rect": [0, 0, *size], **source_info(path)}
+
+    keys = list(sprites)
+    positions, height = shelf_pack([sprites[k][1].get_size() for k in keys])
+    sheet = pg.Surface((ATLAS_WIDTH, height), pg.SRCALPHA)
+    for key, pos in zip(keys, positions):
+        path, img = sprites[key]
+        sheet.blit(img, pos, special_flags=pg.BLEND_RGBA_MAX)  # 透明なシートへ画素をそのまま写す
+        entries[key] = {"sheet": ATLAS_SHEET, "rect": [*pos, *img.get_size()], **source_info(path)}
+    pg.image.save(sheet, ATLAS_SHEET)
+
+    with open(ATLAS_INDEX, "w") as f:
+        json.dump({"version": ATLAS_VERSION, "entries": entries}, f, indent=1, sort_keys=True)
+    print(f"{ATLAS_SHEET}: {len(sprites)} images, {ATLAS_WIDTH}x{height}")
+    print(f"{ATLAS_INDEX}: {len(entries)} entries")
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
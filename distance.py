@@ -0,0 +1,143 @@
+"""迷路上の道のり（幅優先探索）
+
+DistanceField は1つ以上の始点からの道のりを、迷路全体について一度だけ求めて
+おく。各マスには最も近い始点も覚えるので、「一番近いイベントマスはどこで
+何歩か」は表を引くだけ、そこまでの道順は道のりが1ずつ減る隣をたどるだけ
+（道の長さに比例）で答えられる。イベントマスを消したときは、その始点が
+一番近かったマスだけを周りから求め直し、ボスマスを置いたときは、新しい
+始点の方が近くなるマスだけを書き換える。
+
+within は1つのマスから limit 歩以内だけを調べる小さな探索で、イベント同士の
+間隔のように近くだけを見ればよいときに使う。
+"""
+import heapq
+from array import array
+from collections import deque
+
+from maze import PATH
+
+
+class DistanceField:
+    def __init__(self, maze, sources=()):
+        self.cells = maze.cells  # MazeGrid の行優先の1次元配列
+        self.width, self.height = maze.width, maze.height
+        n = self.width * self.height
+        self.dist = array("i", [-1]) * n  # 最も近い始点までの歩数（-1: 届かない）
+        self.owner = array("i", [-1]) * n  # 最も近い始点のマス番号
+        self.sources = set()
+        queue = deque()
+        for x, y in sources:  # 全部の始点から同時に広げる
+            s = y * self.width + x
+            if s not in self.sources:
+                self.sources.add(s)
+                self.dist[s] = 0
+                self.owner[s] = s
+                queue.append(s)
+        self._relax(queue)
+
+    def _neighbors(self, i):
+        width, cells = self.width, self.cells
+        x = i % width
+        if x > 0 and cells[i - 1] == PATH:
+            yield i - 1
+        if x < width - 1 and cells[i + 1] == PATH:
+            yield i + 1
+        if i >= width and cells[i - width] == PATH:
+            yield i - width
+        if i + width < len(cells) and cells[i + width] == PATH:
+            yield i + width
+
+    def _relax(self, queue):
+        # queue のマスから、今より短くなるマスだけを広げる（道のりの短い順に取り出す）
+        dist, owner, cells, width = self.dist, self.owner, self.cells, self.width
+        n = len(cells)
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            x = i % width
+            for j in (i - 1 if x > 0 else -1, i + 1 if x < width - 1 else -1, i - width, i + width):
+                if 0 <= j < n and cells[j] == PATH and (dist[j] < 0 or d < dist[j]):
+                    dist[j] = d
+                    owner[j] = owner[i]
+                    queue.append(j)
+
+    def add_source(self, x, y):
+        s = y * self.width + x
+        if s in self.sources:
+            return
+        self.sources.add(s)
+        self.dist[s] = 0
+        self.owner[s] = s
+        self._relax(deque([s]))
+
+    def remove_source(self, x, y):
+        """始点を消し、その始点が一番近かったマスだけを求め直す"""
+        s = y * self.width + x
+        if s not in self.sources:
+            return
+        self.sources.discard(s)
+        dist, owner = self.dist, self.owner
+        # s が一番近かったマス（s を根とする探索木）を集めて未確定に戻す
+        region = [s]
+        owner[s] = -1
+        for i in region:
+            for j in self._neighbors(i):
+                if owner[j] == s:
+                    owner[j] = -1
+                    region.append(j)
+        for i in region:
+            dist[i] = -1
+        # 周りの確定したマスから、道のりの短い順に広げ直す
+        heap = []
+        for i in region:
+            for j in self._neighbors(i):
+                if dist[j] >= 0:
+                    heap.append((dist[j] + 1, i, owner[j]))
+        heapq.heapify(heap)
+        while heap:
+            d, i, o = heapq.heappop(heap)
+            if dist[i] >= 0:
+                continue
+            dist[i] = d
+            owner[i] = o
+            for j in self._neighbors(i):
+                if dist[j] < 0:
+                    heapq.heappush(heap, (d + 1, j, o))
+
+    def distance(self, x, y):
+        """最も近い始点までの歩数（届かなければ -1）"""
+        return self.dist[y * self.width + x]
+
+    def nearest(self, x, y):
+        """最も近い始点の座標（届かなければ None）"""
+        o = self.owner[y * self.width + x]
+        return None if o < 0 else (o % self.width, o // self.width)
+
+    def path(self, x, y):
+        """(x, y) から最も近い始点までの道順（次のマスから始点まで）。届かなければ []"""
+        i = y * self.width + x
+        if self.dist[i] < 0:
+            return []
+        dist, width = self.dist, self.width
+        path = []
+        while dist[i] > 0:
+            i = next(j for j in self._neighbors(i) if dist[j] == dist[i] - 1)
+            path.append((i % width, i // width))
+        return path
+
+
+def within(maze, x, y, limit):
+    """(x, y) から limit 歩以内で行ける道マスと、その歩数の辞書"""
+    width, height = len(maze[0]), len(maze)
+    seen = {(x, y): 0}
+    queue = deque([(x, y)])
+    while queue:
+        cx, cy = queue.popleft()
+        d = seen[(cx, cy)] + 1
+        if d > limit:
+            continue
+        for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+            if 0 <= nx < width and 0 <= ny < height and maze[ny][nx] == PATH and (nx, ny) not in seen:
+                seen[(nx, ny)] = d
+                queue.append((nx, ny))
+    return seen
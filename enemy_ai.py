@@ -0,0 +1,199 @@
+"""敵のスキル選択を先読みで行う AI（期待値最大化探索）
+
+戦闘の状態（HP・MP・攻撃力・防御力）をタプルにして、
+敵の手番は「最も有利なスキルを選ぶ」、ボスの追加スキルとプレイヤーの手番は
+「起こりうる手の平均」として数ターン先まで読む。1手あたりの時間を
+budget_ms で区切り、反復深化で時間内に読み切った深さの結果を使う。
+評価済みの局面は上限付きの置換表に覚えておき、次のターンでも使い回す。
+
+    python enemy_ai.py [戦闘回数]
+"""
+import sys
+import time
+from collections import OrderedDict
+
+from entities import Boss, skill_pool
+
+SKILL_COSTS = {skill.skill_id: skill.mana_cost for skill in skill_pool}
+
+# 状態のタプルの並び
+HP, MP, ATK, DEF = range(4)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def state_of(entity):
+    return (entity.hp, getattr(entity, "mp", 0), entity.atk, entity.def_)
+
+
+def apply_skill(caster, target, skill):
+    """番号 skill のスキルを使った後の (caster, target) を返す"""
+    hp, mp, atk, def_ = caster
+    if skill == 0:  # Boost Attack
+        return (hp, mp, atk + 5, def_), target
+    if skill == 1:  # Boost Defense
+        return (hp, mp, atk, def_ + 5), target
+    if skill == 2:  # Increase Damage
+        return caster, target[:DEF] + (max(0, target[DEF] - 5),)
+    # Double Strike / Life Steal / Nullify Skill はフラグを立てるだけで戦闘の結果は変わらない
+    return caster, target
+
+
+def normal_attack(attacker, target, target_is_player):
+    # プレイヤーは防御力でダメージを減らさない（Player.take_damage と同じ）
+    damage = attacker[ATK]
+    if target_is_player:
+        target_hp = max(0, target[HP] - damage)
+    else:
+        target_hp = target[HP] - max(0, damage - target[DEF])
+    return attacker, (target_hp,) + target[MP:]
+
+
+def evaluate(player, enemy):
+    """敵から見た局面の良さ（0〜1）。互いに相手を倒すまでのターン数で比べる"""
+    to_enemy = max(0, player[ATK] - enemy[DEF])
+    if to_enemy == 0:
+        return 1.0
+    enemy_turns = enemy[HP] / to_enemy
+    player_turns = player[HP] / max(1, enemy[ATK])
+    return enemy_turns / (enemy_turns + player_turns)
+
+
+class ExpectimaxAI:
+    """BattleEngine の enemy_ai に渡すと、敵のスキルを探索で選ぶ
+
+    max_depth まで読み切れば結果は時間に依存しないので、リプレイでも同じ手になる。
+    budget_ms は遅いマシンでフレームを止めないための上限。
+    """
+
+    def __init__(self, budget_ms=20, max_depth=2, table_size=100_000):
+        self.budget_ms = budget_ms
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = OrderedDict()  # (局面, 深さ) -> 評価値（古いものから捨てる）
+        self.deadline = None
+        self.searches = 0
+        self.nodes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.search_time = 0.0
+        self.depth_reached = 0  # 直前の探索で読み切った深さ
+
+    def choose(self, engine):
+        enemy = engine.enemy
+        candidates = [s for s in enemy.skills if s.name != enemy.previous_skill] or enemy.skills
+        if len(candidates) == 1:
+            return candidates[0]
+        self.prepare(engine.player, enemy)
+        player, state = state_of(engine.player), state_of(enemy)
+
+        start = time.perf_counter()
+        best = candidates[0]
+        for depth in range(1, self.max_depth + 1):
+            # 深さ1は必ず読み切る
+            self.deadline = None if depth == 1 else start + self.budget_ms / 1000
+            try:
+                best = max(candidates, key=lambda s: self.after_enemy_skill(
+                    player, state, s.skill_id, depth))
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+        self.searches += 1
+        self.search_time += time.perf_counter() - start
+        return best
+
+    def prepare(self, player, enemy):
+        self.is_boss = isinstance(enemy, Boss)
+        self.enemy_skills = [s.skill_id for s in enemy.skills]
+        own = sorted({s.skill_id for s in player.skills})
+        # プレイヤーの手は全通りではなく代表的な数通りに絞る:
+        # 通常攻撃だけ、スキル1つ＋攻撃、持っているスキルを全部使って攻撃
+        plans = [()] + [(s,) for s in own]
+        if len(own) > 1:
+            plans.append(tuple(own))
+        self.plans = plans
+        self.context = (self.is_boss, tuple(self.enemy_skills), tuple(own))  # 置換表のキーに含める
+
+    def tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def after_enemy_skill(self, player, enemy, skill, depth):
+        # 敵がスキルを使い通常攻撃した後の、プレイヤーの手番の期待値
+        self.tick()
+        enemy, player = apply_skill(enemy, player, skill)
+        enemy, player = normal_attack(enemy, player, True)
+        if player[HP] <= 0:
+            return 1.0
+        total = 0.0
+        for plan in self.plans:
+            p, e = player, enemy
+            for s in plan:
+                if p[MP] >= SKILL_COSTS[s]:
+                    p = (p[HP], p[MP] - SKILL_COSTS[s]) + p[ATK:]
+                    p, e = apply_skill(p, e, s)
+            p, e = normal_attack(p, e, False)
+            if e[HP] <= 0:
+                continue  # 敵が倒れた（評価0）
+            total += evaluate(p, e) if depth == 1 else self.enemy_turn(p, e, skill, depth - 1)
+        return total / len(self.plans)
+
+    def enemy_turn(self, player, enemy, previous, depth):
+        key = (self.context, player, enemy, previous, depth)
+        self.lookups += 1
+        value = self.table.get(key)
+        if value is not None:
+            self.hits += 1
+            self.table.move_to_end(key)
+            return value
+
+        candidates = [s for s in self.enemy_skills if s != previous] or self.enemy_skills
+        if self.is_boss:
+            # ボスが先に使う追加スキルはランダムなので平均をとる
+            value = 0.0
+            for extra in self.enemy_skills:
+                e, p = apply_skill(enemy, player, extra)
+                value += max(self.after_enemy_skill(p, e, s, depth) for s in candidates)
+            value /= len(self.enemy_skills)
+        else:
+            value = max(self.after_enemy_skill(player, enemy, s, depth) for s in candidates)
+
+        self.table[key] = value
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {"searches": self.searches,
+                "nodes": self.nodes,
+                "nodes_per_sec": self.nodes / self.search_time if self.search_time else 0.0,
+                "ms_per_search": self.search_time * 1000 / self.searches if self.searches else 0.0,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "table_size": len(self.table),
+                "depth_reached": self.depth_reached}
+
+
+if __name__ == "__main__":
+    import random
+
+    from battle_engine import run_battle
+    from entities import Player, generate_boss
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for name, ai in [("random", None), ("expectimax", ExpectimaxAI())]:
+        rng = random.Random(0)
+        wins = turns = 0
+        for _ in range(n):
+            result = run_battle(Player(atk=45, def_=10, hp=300, mp=40, rng=rng), generate_boss(rng),
+                                rng=rng, enemy_ai=ai)
+            wins += result["won"]
+            turns += result["turns"]
+        print(f"boss ({name}): player win rate {wins / n:.3f}, mean turns {turns / n:.2f}")
+        if ai is not None:
+            stats = ai.stats()
+            print(f"  {stats['nodes']} nodes, {stats['nodes_per_sec']:.0f} nodes/s, "
+                  f"{stats['ms_per_search']:.2f} ms/turn, cache hit rate {stats['hit_rate']:.3f}, "
+                  f"depth {stats['depth_reached']}")
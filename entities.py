@@ -0,0 +1,177 @@
+import random
+
+
+class Skill:
+    def __init__(self, name, mana_cost, effect, skill_id=None):
+        self.name = name        # スキル名
+        self.mana_cost = mana_cost  # マナコスト
+        self.effect = effect    # スキル効果（関数）
+        self.skill_id = skill_id  # セーブデータで使う番号（変えないこと）
+
+    def use(self, caster, target=None):
+        self.effect(caster, target)
+
+    def __reduce__(self):
+        # 効果がlambdaなのでpickleでは番号だけを保存し、読み込み時に登録済みのスキルに戻す
+        return skill_by_id, (self.skill_id,)
+
+
+# プレイヤーのスキルと敵のスキル共通のスキル候補
+skill_pool = [
+    Skill("Boost Attack", 5, lambda caster, _: setattr(caster, 'atk', caster.atk + 5), skill_id=0),
+    Skill("Boost Defense", 5, lambda caster, _: setattr(caster, 'def_', caster.def_ + 5), skill_id=1),
+    Skill("Increase Damage", 4, lambda _, target: setattr(target, 'def_', max(0, target.def_ - 5)), skill_id=2),
+    Skill("Double Strike", 6, lambda caster, _: setattr(caster, 'next_attack_double', True), skill_id=3),
+    Skill("Life Steal", 8, lambda caster, _: setattr(caster, 'next_attack_heal', True), skill_id=4),
+    Skill("Nullify Skill", 7, lambda caster, _: setattr(caster, 'nullify_next_skill', True), skill_id=5)
+]
+
+# 番号 -> スキル（セーブデータの読み込みに使う）
+SKILLS = {skill.skill_id: skill for skill in skill_pool}
+
+
+def skill_by_id(skill_id):
+    return SKILLS[skill_id]
+
+
+# プレイヤークラス
+class Player:
+    __slots__ = ("atk", "def_", "mp", "hp", "skills",
+                 "next_attack_double", "next_attack_heal", "nullify_next_skill")
+
+    def __init__(self, atk=10, def_=5, mp=20, hp=100, rng=random):
+        self.atk = atk  # 攻撃力
+        self.def_ = def_  # 防御力
+        self.mp = mp  # マナ
+        self.hp = hp  # 体力
+        self.skills = []  # 所持スキル
+        self.init_skills(rng)  # 初期スキルを設定
+        self.next_attack_double = False  # 次の通常攻撃が二回攻撃になる
+        self.next_attack_heal = False  # 次の通常攻撃で回復する
+        self.nullify_next_skill = False  # 次の相手スキルを無効化
+
+    def init_skills(self, rng=random):
+        # ランダムに1つスキルを選択して所持
+        self.skills.append(rng.choice(skill_pool))
+
+    def take_damage(self, damage):
+        self.hp -= damage
+        if self.hp < 0:
+            self.hp = 0  # HPが0未満にならないように調整
+        return self.hp
+
+    def use_mana(self, amount):
+        if self.mp >= amount:
+            self.mp -= amount
+            return True
+        return False
+
+    def normal_attack(self, target):
+        damage = self.atk
+        if self.next_attack_double:
+            damage *= 2
+            self.next_attack_double = False
+        target.take_damage(damage)
+        if self.next_attack_heal:
+            self.hp += damage
+            self.next_attack_heal = False
+
+# 敵クラス
+class Enemy:
+    __slots__ = ("atk", "def_", "hp", "skills", "previous_skill",
+                 "next_attack_double", "next_attack_heal", "nullify_next_skill")
+
+    def __init__(self, atk, def_, hp, rng=random):
+        self.atk = atk  # 攻撃力
+        self.def_ = def_  # 防御力
+        self.hp = hp  # 体力（低めに設定）
+        self.skills = rng.sample(skill_pool, 2)  # 初期から2つのスキルをランダムに所持
+        self.previous_skill = None  # 前のターンで使ったスキル
+        # スキルの効果で立つフラグ（敵の通常攻撃やスキルには影響しない）
+        self.next_attack_double = False
+        self.next_attack_heal = False
+        self.nullify_next_skill = False
+
+    def take_damage(self, damage):
+        reduced_damage = max(0, damage - self.def_)
+        self.hp -= reduced_damage
+        return self.hp
+
+    def normal_attack(self, target):
+        target.take_damage(self.atk)
+
+# ボスクラス
+class Boss:
+    __slots__ = ("atk", "def_", "hp", "skills", "previous_skill",
+                 "next_attack_double", "next_attack_heal", "nullify_next_skill")
+
+    def __init__(self, atk=20, def_=15, hp=300, rng=random):
+        self.atk = atk  # 攻撃力（非常に高い）
+        self.def_ = def_  # 防御力（非常に高い）
+        self.hp = hp  # 体力（非常に高い）
+        self.skills = rng.sample(skill_pool, 5)  # 初期から5つのスキルをランダムに所持
+        self.previous_skill = None  # 前のターンで使ったスキル
+        # スキルの効果で立つフラグ（敵の通常攻撃やスキルには影響しない）
+        self.next_attack_double = False
+        self.next_attack_heal = False
+        self.nullify_next_skill = False
+
+    def take_damage(self, damage):
+        reduced_damage = max(0, damage - self.def_)
+        self.hp -= reduced_damage
+        return self.hp
+
+    def normal_attack(self, target):
+        target.take_damage(self.atk)
+
+# 敵のパターン定義（名前 -> ステータス）
+ENEMY_ARCHETYPES = {
+    "attacker": {"atk": 8, "def_": 3, "hp": 40},   # 攻撃型
+    "defender": {"atk": 5, "def_": 6, "hp": 50},   # 防御型
+    "balanced": {"atk": 6, "def_": 4, "hp": 45},   # バランス型
+    "striker": {"atk": 10, "def_": 2, "hp": 35},   # 高火力型
+    "tank": {"atk": 4, "def_": 7, "hp": 55},       # タンク型
+}
+
+# 敵を1体だけ生成する（name を省略するとランダムなパターン）
+def spawn_enemy(name=None, rng=random):
+    if name is None:
+        name = rng.choice(list(ENEMY_ARCHETYPES))
+    return Enemy(rng=rng, **ENEMY_ARCHETYPES[name])
+
+# 全パターンの敵を1体ずつ生成する
+def generate_enemy_patterns(rng=random):
+    return [Enemy(rng=rng, **stats) for stats in ENEMY_ARCHETYPES.values()]
+
+# ボス生成関数
+def generate_boss(rng=random):
+    return Boss(rng=rng)
+
+# 強化マスの効果（log に None を渡すとメッセージを出さない）
+def apply_buff(player, action, rng=random, log=print):
+    log = log or (lambda _: None)
+    if action == "add_skill":
+        new_skill = rng.choice(skill_pool)
+        player.skills.append(new_skill)
+        log(f"New skill added: {new_skill.name}")
+    elif action == "increase_stat":
+        stat_to_increase = rng.choice(["atk", "def_", "hp", "mp"])
+        if stat_to_increase == "atk":
+            player.atk += 5
+            log("Attack increased by 5!")
+        elif stat_to_increase == "def_":
+            player.def_ += 5
+            log("Defense increased by 5!")
+        elif stat_to_increase == "hp":
+            player.hp += 20
+            log("HP increased by 20!")
+        elif stat_to_increase == "mp":
+            player.mp += 10
+            log("MP increased by 10!")
+
+# 回復マスの効果
+def handle_heal(player, log=print):
+    max_hp = 100  # プレイヤーの最大HP（必要に応じて変更可能）
+    player.hp = max_hp
+    if log:
+        log("Player's HP has been fully restored!")
@@ -0,0 +1,112 @@
+"""大量の戦闘参加者を配列で持つエンティティプール
+
+1体ごとにオブジェクトを作る代わりに、ステータスごとの配列（struct of arrays）に
+エンティティ番号で添字を付けて格納する。Player/Enemy/Boss と同じ戦闘ルール
+（通常攻撃、ダメージ計算、スキルの効果）を番号に対して適用する。
+"""
+import random
+from array import array
+
+from entities import ENEMY_ARCHETYPES, skill_pool
+
+# フラグのビット
+DOUBLE, HEAL, NULLIFY = 1, 2, 4
+
+# 種類（ダメージ計算が違う）
+KIND_PLAYER, KIND_ENEMY = 0, 1
+
+
+class EntityPool:
+    def __init__(self, capacity=0):
+        self.hp = array("i")
+        self.atk = array("i")
+        self.def_ = array("i")
+        self.mp = array("i")
+        self.kind = bytearray()
+        self.flags = bytearray()  # DOUBLE / HEAL / NULLIFY の組み合わせ
+        self.skills = array("H")  # skill_pool の番号のビット集合
+        self.alive = bytearray()
+        self.free_ids = []  # 削除されて再利用できる番号
+        if capacity:
+            self.reserve(capacity)
+
+    def __len__(self):
+        return len(self.hp) - len(self.free_ids)
+
+    def reserve(self, capacity):
+        # 先に領域を確保しておき、空き番号として使う
+        start = len(self.hp)
+        for _ in range(capacity):
+            self._append()
+        self.free_ids.extend(range(start + capacity - 1, start - 1, -1))
+
+    def _append(self):
+        self.hp.append(0)
+        self.atk.append(0)
+        self.def_.append(0)
+        self.mp.append(0)
+        self.kind.append(KIND_ENEMY)
+        self.flags.append(0)
+        self.skills.append(0)
+        self.alive.append(0)
+        return len(self.hp) - 1
+
+    def add(self, atk, def_, hp, mp=0, kind=KIND_ENEMY, skills=()):
+        """エンティティを追加して番号を返す。skills は skill_pool の番号"""
+        i = self.free_ids.pop() if self.free_ids else self._append()
+        self.hp[i], self.atk[i], self.def_[i], self.mp[i] = hp, atk, def_, mp
+        self.kind[i] = kind
+        self.flags[i] = 0
+        mask = 0
+        for skill in skills:
+            mask |= 1 << skill
+        self.skills[i] = mask
+        self.alive[i] = 1
+        return i
+
+    def spawn_enemy(self, name=None, rng=random):
+        """ENEMY_ARCHETYPES から敵を1体追加する（スキルは Enemy と同じく2つ）"""
+        if name is None:
+            name = rng.choice(list(ENEMY_ARCHETYPES))
+        stats = ENEMY_ARCHETYPES[name]
+        return self.add(stats["atk"], stats["def_"], stats["hp"],
+                        skills=rng.sample(range(len(skill_pool)), 2))
+
+    def remove(self, i):
+        # 同じ番号を2回消すと空き番号が重複し、2体が同じ番号を共有してしまう
+        if not self.alive[i]:
+            return
+        self.alive[i] = 0
+        self.free_ids.append(i)
+
+    def skill_ids(self, i):
+        mask = self.skills[i]
+        return [s for s in range(len(skill_pool)) if mask >> s & 1]
+
+    def take_damage(self, i, damage):
+        if self.kind[i] == KIND_PLAYER:
+            self.hp[i] = max(0, self.hp[i] - damage)
+        else:
+            self.hp[i] -= max(0, damage - self.def_[i])
+        return self.hp[i]
+
+    def normal_attack(self, attacker, target):
+        self.take_damage(target, self.atk[attacker])
+
+    def use_skill(self, caster, target, skill):
+        """skill_pool[skill] の効果を適用する（フラグは立てるだけで、戦闘の計算では使わない）"""
+        if skill == 0:  # Boost Attack
+            self.atk[caster] += 5
+        elif skill == 1:  # Boost Defense
+            self.def_[caster] += 5
+        elif skill == 2:  # Increase Damage
+            self.def_[target] = max(0, self.def_[target] - 5)
+        elif skill == 3:  # Double Strike
+            self.flags[caster] |= DOUBLE
+        elif skill == 4:  # Life Steal
+            self.flags[caster] |= HEAL
+        elif skill == 5:  # Nullify Skill
+            self.flags[caster] |= NULLIFY
+
+    def living(self):
+        return [i for i, a in enumerate(self.alive) if a and self.hp[i] > 0]
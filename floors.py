@@ -0,0 +1,100 @@
+"""次の階層を先に作っておくパイプライン
+
+迷路・イベントマス・初期位置の生成（と、渡されていれば静的レイヤーの
+描画）をワーカースレッドで行い、できた階層を上限付きのキューに入れておく。
+プレイしている間に次の depth 階層が用意されるので、階層の切り替えは
+キューから取り出すだけになる。階層の乱数はワーカー専用の Random で、
+生成する順番は常に同じなので、シードが同じなら同じ階層の並びになる。
+迷路の生成アルゴリズムは maze_algorithms の名前で選ぶ。
+"""
+import queue
+import random
+import threading
+
+from maze import generate_maze
+from maze_algorithms import MAZE_ALGORITHM, maze_generator
+from placement import generate_event_tiles, get_random_start
+
+FLOOR_PREFETCH = 2  # 先に作っておく階層の数
+
+
+class Floor:
+    def __init__(self, number, maze, events, start):
+        self.number = number  # 1から始まる階層の番号
+        self.maze = maze
+        self.events = events
+        self.start = start
+        self.surface = None  # 描画済みの静的レイヤー（render を渡したときだけ）
+        self.rng_state = None  # この階層を作り終えた時点の乱数の状態（続きから次の階層を作れる）
+
+
+def build_floor(number, width, height, rng=random, render=None, generate=generate_maze):
+    maze = generate(width, height, rng)
+    events = generate_event_tiles(maze, rng)
+    floor = Floor(number, maze, events, get_random_start(maze, events, rng))
+    if render is not None:
+        floor.surface = render(floor)
+    return floor
+
+
+class FloorPipeline:
+    """depth 階層先までを先に生成する（depth=0 なら呼ばれたときに生成する）"""
+
+    def __init__(self, width, height, rng=random, depth=FLOOR_PREFETCH, render=None, number=0,
+                 algorithm=MAZE_ALGORITHM):
+        self.width, self.height = width, height
+        self.generate = maze_generator(algorithm)
+        self.rng = rng  # 階層の生成だけに使う
+        self.render = render
+        self.depth = depth
+        self.number = number  # 最後に生成した階層（セーブデータから再開するときは途中から）
+        self.closed = False
+        self.error = None  # ワーカーで起きた例外（以降の next_floor で毎回出し直す）
+        self.thread = None
+        if depth > 0:
+            self.queue = queue.Queue(maxsize=depth)
+            self.thread = threading.Thread(target=self._run, name="floor-pipeline", daemon=True)
+            self.thread.start()
+
+    def _build(self):
+        self.number += 1
+        floor = build_floor(self.number, self.width, self.height, self.rng, self.render, self.generate)
+        floor.rng_state = self.rng.getstate()
+        return floor
+
+    def _run(self):
+        while not self.closed:
+            try:
+                floor = self._build()
+            except Exception as e:  # 取り出した側で例外を出し直す
+                self.error = floor = e
+            while not self.closed:
+                try:
+                    self.queue.put(floor, timeout=0.1)  # キューが満杯の間は待つ
+                    break
+                except queue.Full:
+                    pass
+            if isinstance(floor, Exception):
+                return
+
+    def next_floor(self):
+        if self.thread is None:
+            return self._build()
+        if self.error is not None and self.queue.empty():
+            raise self.error  # ワーカーはもう終わっているので待たない
+        floor = self.queue.get()  # 先読みが追いついていなければここで待つ
+        if isinstance(floor, Exception):
+            raise floor
+        return floor
+
+    def ready(self):
+        """待たずに取り出せる階層の数（生成に失敗した印は数えない）"""
+        if self.thread is None:
+            return 0
+        with self.queue.mutex:
+            return sum(not isinstance(floor, Exception) for floor in self.queue.queue)
+
+    def close(self):
+        self.closed = True
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,110 @@
+"""視界（シャドウキャスティング）と探索済みのマス
+
+プレイヤーの位置から8つの八分円ごとに影を投げて、半径 radius 以内で
+壁に遮られずに見えるマスを求める（壁のマスそのものは見える）。見えたマスは
+探索済みのビットマップに残るので、見えなくなっても暗く表示できる。
+
+求め直すのは位置が変わったときだけで、前回と見え方が変わったマスだけを
+返す。迷路は階層の間は変わらないので、同じ位置の結果は上限付きで覚えておき、
+来た道を戻るときは計算しない。1回の計算量は半径で決まり、迷路の大きさによらない。
+"""
+from collections import OrderedDict
+
+from maze import PATH
+
+FOV_RADIUS = 6  # 見える距離（マス）
+FOV_CACHE_SIZE = 256  # 覚えておく位置の数
+
+UNSEEN, EXPLORED, VISIBLE = range(3)  # マスの状態
+
+# 八分円ごとの座標変換 (xx, xy, yx, yy)
+_OCTANTS = [(1, 0, 0, -1), (0, 1, -1, 0), (0, -1, -1, 0), (-1, 0, 0, -1),
+            (-1, 0, 0, 1), (0, -1, 1, 0), (0, 1, 1, 0), (1, 0, 0, 1)]
+
+
+class FieldOfView:
+    def __init__(self, maze, radius=FOV_RADIUS, cache_size=FOV_CACHE_SIZE):
+        self.cells = maze.cells  # MazeGrid の行優先の1次元配列
+        self.width, self.height = maze.width, maze.height
+        self.radius = radius
+        self.explored = bytearray(self.width * self.height)  # 一度でも見えたマス
+        self.visible = frozenset()  # 今見えているマスの番号（y * width + x）
+        self.pos = None
+        self.cache = OrderedDict()  # 位置 -> 見えるマスの frozenset
+        self.cache_size = cache_size
+        self.computed = 0
+        self.cache_hits = 0
+
+    def state(self, x, y):
+        i = y * self.width + x
+        if i in self.visible:
+            return VISIBLE
+        return EXPLORED if self.explored[i] else UNSEEN
+
+    def update(self, pos):
+        """pos から見えるマスを求め直し、状態が変わったマスの (x, y) のリストを返す"""
+        if pos == self.pos:
+            return []
+        self.pos = pos
+        visible = self.cache.get(pos)
+        if visible is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end(pos)
+        else:
+            visible = self.compute(*pos)
+            if self.cache_size:
+                self.cache[pos] = visible
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        changed = visible ^ self.visible
+        explored = self.explored
+        for i in visible - self.visible:
+            explored[i] = 1
+        self.visible = visible
+        width = self.width
+        return [(i % width, i // width) for i in changed]
+
+    def compute(self, px, py):
+        """(px, py) から見えるマスの番号の frozenset"""
+        self.computed += 1
+        seen = {py * self.width + px}
+        for octant in _OCTANTS:
+            self._cast(seen, px, py, 1, 1.0, 0.0, *octant)
+        return frozenset(seen)
+
+    def _cast(self, seen, cx, cy, row, start, end, xx, xy, yx, yy):
+        # row 行目から、傾き start〜end の範囲の光を外側へ進める。
+        # 壁に当たったら、その手前までの範囲を次の行から再帰で続ける
+        if start < end:
+            return
+        cells, width, height, radius = self.cells, self.width, self.height, self.radius
+        r2 = radius * radius + radius  # 少し丸めた円
+        new_start = 0.0
+        for j in range(row, radius + 1):
+            dy = -j
+            blocked = False
+            for dx in range(-j, 1):
+                r_slope = (dx + 0.5) / (dy - 0.5)
+                if start < r_slope:
+                    continue
+                l_slope = (dx - 0.5) / (dy + 0.5)
+                if end > l_slope:
+                    break
+                x = cx + dx * xx + dy * xy
+                y = cy + dx * yx + dy * yy
+                inside = 0 <= x < width and 0 <= y < height
+                if inside and dx * dx + dy * dy <= r2:
+                    seen.add(y * width + x)
+                wall = not inside or cells[y * width + x] != PATH
+                if blocked:
+                    if wall:
+                        new_start = r_slope
+                        continue
+                    blocked = False
+                    start = new_start
+                elif wall and j < radius:
+                    blocked = True
+                    self._cast(seen, cx, cy, j + 1, start, l_slope, xx, xy, yx, yy)
+                    new_start = r_slope
+            if blocked:
+                break
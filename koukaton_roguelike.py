@@ -1,14 +1,45 @@
+import argparse
+import base64
+import math
 import os
 import sys
 import pygame as pg
 import random
 from copy import deepcopy
 
+from assets import assets
+from battle_engine import BattleEngine
+from battle_log import BattleLog, LogWriter
+from distance import DistanceField
+from enemy_ai import ExpectimaxAI
+from entities import Boss, Player, Skill, apply_buff, handle_heal, spawn_enemy
+from floors import FLOOR_PREFETCH, Floor, FloorPipeline
+from fov import EXPLORED, UNSEEN, FieldOfView
+from maze import move_player
+from maze_algorithms import MAZE_ALGORITHM, MAZE_ALGORITHMS
+from placement import spawn_boss_tile
+from profiler import profiler
+from replay import InputRecorder
+from scenes import Scene, SceneManager
+from snapshot import Snapshot, encode, load, save
+from world import ChunkedWorld
+
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
 # 定数設定
 WIDTH, HEIGHT = 11, 11  # 11x11マスで固定
 CELL_SIZE = 40
+FPS = 60
+BATTLE_STEP_MS = 500  # 戦闘で行動ごとにあける時間
+KEY_REPEAT_DELAY = 200  # 矢印キーを押しっぱなしにしてから連続移動を始めるまでの時間 (ms)
+KEY_REPEAT_INTERVAL = 80  # 連続移動の間隔 (ms)、0なら連続移動しない
+MOVE_TWEEN_MS = 60  # マス間の移動を補間して描く時間 (ms)、0なら補間しない
+AUTO_MOVE_INTERVAL = 80  # クリック移動・自動探索で1マス進む間隔 (ms)
+AUTO_EXPLORE_KEY = pg.K_SPACE  # 一番近いイベントマス（霧の中なら未探索の境目）まで自動で歩くキー
+ENEMY_AI_BUDGET_MS = 20  # 敵が1ターンに先読みに使える時間の上限
+ENEMY_AI_DEPTH = 2  # 敵が先読みするターン数
+BATTLE_LOG_PATH = "battle_log.txt"  # 戦闘ログの全文を追記するファイル
+FOG_OF_WAR = True  # 見えていないマスを隠す（探索済みのマスは暗く表示する）
 WINDOW_WIDTH, WINDOW_HEIGHT = 800, 600
 
 # 色の定義
@@ -18,6 +49,8 @@ RED = (255, 0, 0)    # 戦闘マス
 GREEN = (0, 255, 0)  # 回復マス
 BLUE = (0, 0, 255)   # 強化マス
 PURPLE = (128, 0, 128)  # ボスマス
+FOG_COLOR = (0, 0, 0)  # まだ見ていないマス
+EXPLORED_DIM = (0, 0, 0, 150)  # 探索済みで今は見えていないマスに重ねる色
 
 # イベントマスの種類
 EVENT_TYPES = {
@@ -27,181 +60,6 @@ EVENT_TYPES = {
     "boss": PURPLE
 }
 
-class Skill:
-    def __init__(self, name, mana_cost, effect):
-        self.name = name        # スキル名
-        self.mana_cost = mana_cost  # マナコスト
-        self.effect = effect    # スキル効果（関数）
-
-    def use(self, caster, target=None):
-        self.effect(caster, target)
-
-
-# プレイヤーのスキルと敵のスキル共通のスキル候補
-skill_pool = [
-    Skill("Boost Attack", 5, lambda caster, _: setattr(caster, 'atk', caster.atk + 5)),
-    Skill("Boost Defense", 5, lambda caster, _: setattr(caster, 'def_', caster.def_ + 5)),
-    Skill("Increase Damage", 4, lambda _, target: setattr(target, 'def_', max(0, target.def_ - 5))),
-    Skill("Double Strike", 6, lambda caster, _: setattr(caster, 'next_attack_double', True)),
-    Skill("Life Steal", 8, lambda caster, _: setattr(caster, 'next_attack_heal', True)),
-    Skill("Nullify Skill", 7, lambda caster, _: setattr(caster, 'nullify_next_skill', True))
-]
-
-
-# プレイヤークラス
-class Player:
-    def __init__(self, atk=10, def_=5, mp=20, hp=100):
-        self.atk = atk  # 攻撃力
-        self.def_ = def_  # 防御力
-        self.mp = mp  # マナ
-        self.hp = hp  # 体力
-        self.skills = []  # 所持スキル
-        self.init_skills()  # 初期スキルを設定
-        self.next_attack_double = False  # 次の通常攻撃が二回攻撃になる
-        self.next_attack_heal = False  # 次の通常攻撃で回復する
-        self.nullify_next_skill = False  # 次の相手スキルを無効化
-
-    def init_skills(self):
-        # ランダムに1つスキルを選択して所持
-        self.skills.append(random.choice(skill_pool))
-
-    def take_damage(self, damage):
-        self.hp -= damage
-        if self.hp < 0:
-            self.hp = 0  # HPが0未満にならないように調整
-        return self.hp
-    
-    def use_mana(self, amount):
-        if self.mp >= amount:
-            self.mp -= amount
-            return True
-        return False
-
-    def normal_attack(self, target):
-        damage = self.atk
-        if self.next_attack_double:
-            damage *= 2
-            self.next_attack_double = False
-        target.take_damage(damage)
-        if self.next_attack_heal:
-            self.hp += damage
-            self.next_attack_heal = False
-
-# 敵クラス
-class Enemy:
-    def __init__(self, atk, def_, hp):
-        self.atk = atk  # 攻撃力
-        self.def_ = def_  # 防御力
-        self.hp = hp  # 体力（低めに設定）
-        self.skills = random.sample(skill_pool, 2)  # 初期から2つのスキルをランダムに所持
-        self.previous_skill = None  # 前のターンで使ったスキル
-
-    def take_damage(self, damage):
-        reduced_damage = max(0, damage - self.def_)
-        self.hp -= reduced_damage
-        return self.hp
-
-    def normal_attack(self, target):
-        target.take_damage(self.atk)
-
-# ボスクラス
-class Boss:
-    def __init__(self, atk=20, def_=15, hp=300):
-        self.atk = atk  # 攻撃力（非常に高い）
-        self.def_ = def_  # 防御力（非常に高い）
-        self.hp = hp  # 体力（非常に高い）
-        self.skills = random.sample(skill_pool, 5)  # 初期から5つのスキルをランダムに所持
-
-    def take_damage(self, damage):
-        reduced_damage = max(0, damage - self.def_)
-        self.hp -= reduced_damage
-        return self.hp
-
-    def normal_attack(self, target):
-        target.take_damage(self.atk)
-
-# 敵のパターン定義
-def generate_enemy_patterns():
-    return [
-        Enemy(atk=8, def_=3, hp=40),  # 攻撃型
-        Enemy(atk=5, def_=6, hp=50),  # 防御型
-        Enemy(atk=6, def_=4, hp=45),  # バランス型
-        Enemy(atk=10, def_=2, hp=35), # 高火力型
-        Enemy(atk=4, def_=7, hp=55)   # タンク型
-    ]
-
-# ボス生成関数
-def generate_boss():
-    return Boss()
-
-# 迷路生成関数
-def generate_maze(width, height):
-    maze = [[1 for _ in range(width)] for _ in range(height)]
-    stack = []
-
-    # 初期位置
-    start_x, start_y = 1, 1
-    maze[start_y][start_x] = 0
-    stack.append((start_x, start_y))
-
-    # 移動方向
-    directions = [(-2, 0), (2, 0), (0, -2), (0, 2)]
-
-    while stack:
-        x, y = stack[-1]
-        random.shuffle(directions)
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 < nx < width and 0 < ny < height and maze[ny][nx] == 1:
-                maze[ny][nx] = 0
-                maze[y + dy // 2][x + dx // 2] = 0
-                stack.append((nx, ny))
-                break
-        else:
-            stack.pop()
-
-    return maze
-
-# イベントマス生成関数
-def generate_event_tiles(maze):
-    events = {}
-
-    def place_event(event_type, count):
-        placed = 0
-        while placed < count:
-            x, y = random.randint(1, WIDTH - 2), random.randint(1, HEIGHT - 2)
-            if maze[y][x] == 0 and (x, y) not in events:
-                if not any(abs(x - ex) + abs(y - ey) <= 2 for ex, ey in events if events[(ex, ey)] == event_type):
-                    events[(x, y)] = event_type
-                    placed += 1
-
-    # 戦闘マス：3~5個を分散して配置
-    place_event("battle", random.randint(3, 5))
-
-    # 回復マス：1つのみ配置
-    place_event("heal", 1)
-
-    # 強化マス：2~3個を分散して配置
-    place_event("buff", random.randint(2, 3))
-
-    return events
-
-# ボスマスを生成
-def spawn_boss_tile(maze, events):
-    while True:
-        x, y = random.randint(1, WIDTH - 2), random.randint(1, HEIGHT - 2)
-        if maze[y][x] == 0 and (x, y) not in events:
-            events[(x, y)] = "boss"
-            break
-
-# プレイヤーの初期位置をランダムに設定
-# イベントマスと被らないようにする
-def get_random_start(maze, events):
-    while True:
-        x, y = random.randint(1, WIDTH - 2), random.randint(1, HEIGHT - 2)
-        if maze[y][x] == 0 and (x, y) not in events:
-            return x, y
-
 # 描画関数
 def draw_maze(screen, maze, bg_img, offset_x, offset_y, events):
     for y, row in enumerate(maze):
@@ -220,134 +78,201 @@ def draw_maze(screen, maze, bg_img, offset_x, offset_y, events):
 # プレイヤー描画関数
 def draw_player(screen, player_img, player_pos, offset_x, offset_y):
     x, y = player_pos
-    rect = (offset_x + x * CELL_SIZE, offset_y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-    screen.blit(pg.transform.scale(player_img, (CELL_SIZE, CELL_SIZE)), rect)
+    rect = (round(offset_x + x * CELL_SIZE), round(offset_y + y * CELL_SIZE), CELL_SIZE, CELL_SIZE)
+    screen.blit(player_img, rect)  # player_img はマスの大きさに縮小済み
+
+# 広いワールドの描画関数
+# カメラ（ワールド上のピクセル座標で表した画面左上）から見えるマスだけを描くので、
+# ワールドの大きさに関係なく1フレームの描画量は画面の大きさで決まる
+def draw_world(screen, world, bg_img, camera_x, camera_y):
+    screen.blit(bg_img, (0, 0))  # 壁の部分は背景のまま
+    view_w, view_h = screen.get_size()
+    x0, y0 = int(camera_x // CELL_SIZE), int(camera_y // CELL_SIZE)
+    x1 = min(world.width, int((camera_x + view_w) // CELL_SIZE) + 1)
+    y1 = min(world.height, int((camera_y + view_h) // CELL_SIZE) + 1)
+    size = world.chunk_size
+    for cx, cy in world.chunks_in(x0, y0, x1, y1):
+        chunk = world.chunk(cx, cy)
+        ox, oy = cx * size, cy * size
+        xs = range(max(x0, ox), min(x1, ox + size))
+        for y in range(max(y0, oy), min(y1, oy + size)):
+            row = chunk.maze[y - oy]
+            top = round(y * CELL_SIZE - camera_y)
+            for x in xs:
+                if row[x - ox] == 0:
+                    pg.draw.rect(screen, WHITE, (round(x * CELL_SIZE - camera_x), top, CELL_SIZE, CELL_SIZE))
+        for (x, y), event_type in chunk.events.items():
+            if x0 <= x < x1 and y0 <= y < y1:
+                rect = (round(x * CELL_SIZE - camera_x), round(y * CELL_SIZE - camera_y), CELL_SIZE, CELL_SIZE)
+                pg.draw.rect(screen, EVENT_TYPES[event_type], rect)
+
+# 迷路の静的レイヤー
+# 背景・壁・床・イベントマスを一度だけSurfaceに描いておき、毎フレームは
+# 変化したマス（プレイヤーの移動元と移動先、消えたイベントマス）だけを
+# 画面に書き戻して、その矩形だけを pg.display.update に渡す。
+# 視界があるときは、すべて見えている静的レイヤー（lit）から、見え方が変わった
+# マスだけを表示用のレイヤーに写す
+class MazeLayer:
+    def __init__(self, screen, bg_img):
+        self.bg_img = bg_img
+        self.surface = pg.Surface(screen.get_size()).convert()
+        self.lit = self.surface  # すべてのマスが見えている静的レイヤー
+        self.fov = None  # 視界（None なら霧なし）
+        self.dim = pg.Surface((CELL_SIZE, CELL_SIZE), pg.SRCALPHA)
+        self.dim.fill(EXPLORED_DIM)
+        self.dirty_rects = []  # 次の表示で画面に反映する矩形
+        self.player_rect = None  # 前回プレイヤーを描いた位置
+        self.full_redraw = True
+
+    def render(self, maze, events, offset_x, offset_y):
+        # 静的レイヤーを新しいSurfaceに描く（階層の先読みスレッドからも呼ぶ）
+        surface = pg.Surface(self.surface.get_size(), 0, self.surface)
+        surface.blit(self.bg_img, (0, 0))
+        draw_maze(surface, maze, self.bg_img, offset_x, offset_y, events)
+        return surface
+
+    def rebuild(self, maze, events, offset_x, offset_y, surface=None, fov=None):
+        # 階層が変わったときに静的レイヤーを差し替える（描画済みでなければここで描く）
+        self.maze, self.events = maze, events
+        self.offset_x, self.offset_y = offset_x, offset_y
+        self.lit = surface if surface is not None else self.render(maze, events, offset_x, offset_y)
+        self.fov = fov
+        self.surface = self.lit
+        if fov is not None:  # 迷路全体を霧で覆い、reveal で見えたマスだけを写す
+            self.surface = self.lit.copy()
+            self.surface.fill(FOG_COLOR, (offset_x, offset_y, len(maze[0]) * CELL_SIZE, len(maze) * CELL_SIZE))
+        self.full_redraw = True
+
+    def cell_rect(self, x, y):
+        # 補間中の小数の座標も受け付ける
+        return pg.Rect(round(self.offset_x + x * CELL_SIZE), round(self.offset_y + y * CELL_SIZE), CELL_SIZE, CELL_SIZE)
+
+    def refresh_cell(self, x, y):
+        # イベントマスが消えた（または追加された）マスだけを描き直す
+        rect = self.cell_rect(x, y)
+        pg.draw.rect(self.lit, EVENT_TYPES.get(self.events.get((x, y)), WHITE), rect)
+        if self.fov is not None:
+            self.reveal([(x, y)])
+        else:
+            self.dirty_rects.append(rect)
+
+    def reveal(self, cells):
+        # 視界で見え方が変わったマスを、霧・暗く・そのままのいずれかで写す
+        for x, y in cells:
+            rect = self.cell_rect(x, y)
+            state = self.fov.state(x, y)
+            if state == UNSEEN:
+                self.surface.fill(FOG_COLOR, rect)
+            else:
+                self.surface.blit(self.lit, rect, rect)
+                if state == EXPLORED:
+                    self.surface.blit(self.dim, rect)
+            self.dirty_rects.append(rect)
+
+    def invalidate(self):
+        # 戦闘画面などで画面全体が上書きされたときに呼ぶ
+        self.full_redraw = True
+
+    def present(self, screen, player_img, player_pos):
+        rect = self.cell_rect(*player_pos)
+        if self.full_redraw:
+            screen.blit(self.surface, (0, 0))
+            draw_player(screen, player_img, player_pos, self.offset_x, self.offset_y)
+            pg.display.update()
+            self.full_redraw = False
+            self.dirty_rects.clear()
+            self.player_rect = rect
+            return
+
+        if rect != self.player_rect:
+            self.dirty_rects += [self.player_rect, rect]
+        if not self.dirty_rects:
+            return  # 変化がなければ何も描かない
+        for dirty in self.dirty_rects:
+            screen.blit(self.surface, dirty, dirty)
+        draw_player(screen, player_img, player_pos, self.offset_x, self.offset_y)
+        pg.display.update(self.dirty_rects)
+        self.dirty_rects.clear()
+        self.player_rect = rect
+
+# 戦闘シーン
+# 行動のたびに BATTLE_STEP_MS の間をあけるが、待ち時間はタイマーで処理するので
+# その間もアニメーションと描画は続く
+class BattleScene(Scene):
+    animating = True
+    frame_ms = 50  # 揺れのアニメーションは20fpsで十分
+
+    def __init__(self, player, enemy, rng=random, enemy_ai=None, log_writer=None):
+        super().__init__()
+        # 画面には最新5行しか出さないので直近だけを持ち、全文は log_writer に任せる
+        self.battle_logs = BattleLog(writer=log_writer, title="Boss" if isinstance(enemy, Boss) else "Enemy")
+        self.engine = BattleEngine(player, enemy, logs=self.battle_logs, rng=rng, enemy_ai=enemy_ai)  # 戦闘ルールはエンジンが処理する
+        self.ui_buttons, self.ui_area = create_battle_ui(player)
+        self.log_area = pg.Rect(200, WINDOW_HEIGHT - 100, WINDOW_WIDTH - 200, 100)
+        self.busy = False  # 行動後の待ち時間中は入力を受け付けない
+
+        self.player_path = "fig/3.png"  # プレイヤー画像
+        # 敵画像の判定
+        if isinstance(enemy, Boss):
+            self.enemy_path = "fig/alien1.png"  # ボス画像
+        else:
+            self.enemy_path = "fig/alien1.png"  # 通常敵画像
+        # 描画位置は元画像の大きさを基準にする
+        self.player_rect = assets.image(self.player_path).get_rect(center=(300, 250))
+        self.enemy_rect = assets.image(self.enemy_path).get_rect(center=(500, 250))
+
+    def handle_event(self, event):
+        if self.busy or not self.engine.is_player_turn:
+            return
+        if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:  # 左クリック
+            for button in self.ui_buttons:
+                if button["rect"].collidepoint(event.pos) and self.engine.can_use(button["action"]):
+                    self.engine.player_action(button["action"])
+                    self.wait_step()
+                    return
+
+    def wait_step(self):
+        self.busy = True
+        self.manager.after(BATTLE_STEP_MS, self.next_step)
+
+    def next_step(self):
+        self.busy = False
+        if self.engine.is_over():
+            if self.engine.player_won():  # プレイヤーが勝利した場合
+                self.engine.grant_victory_reward()
+            self.manager.pop()
+        elif not self.engine.is_player_turn:
+            # 敵のターン
+            self.engine.enemy_turn()
+            self.wait_step()
 
-def move_player(player_pos, direction, maze, events):
-    x, y = player_pos
-    dx, dy = direction
-    new_x, new_y = x + dx, y + dy  # 移動後の位置を計算
-
-    if 0 <= new_x < WIDTH and 0 <= new_y < HEIGHT and maze[new_y][new_x] == 0:
-        # イベントマスに到達した場合
-        if (new_x, new_y) in events:
-            event_type = events[(new_x, new_y)]
-            if event_type == "battle":
-                return "battle", new_x, new_y  # 戦闘マスのイベントを返す
-            elif event_type == "boss":
-                return "boss", new_x, new_y  # ボスマスのイベントを返す
-            elif event_type == "buff":
-                return "buff", new_x, new_y  # 強化マスのイベントを返す
-            elif event_type == "heal":
-                return "heal", new_x, new_y  # 回復マスのイベントを返す
-        return (new_x, new_y)  # 通常移動の場合
-
-    return player_pos  # 壁の場合は移動しない
-
-
-def start_battle(screen, player, enemy, ui_buttons, ui_area, log_area):
-    battle_logs = []
-    is_player_turn = True
-    used_actions = {"attack": False, "skills": set()}  # 使用済みアクションを追跡
-
-    player_img = pg.image.load("fig/3.png")  # プレイヤー画像をロード
-    # 敵画像の判定
-    if isinstance(enemy, Boss):
-        enemy_img = pg.image.load("fig/alien1.png")  # ボス画像
-    else:
-        enemy_img = pg.image.load("fig/alien1.png")  # 通常敵画像
-    while player.hp > 0 and enemy.hp > 0:
+    def draw(self, screen, now):
         screen.fill((0, 0, 0))  # 背景をリセット
         battle_area = pg.Rect(200, 100, 400, 300)  # 戦闘エリア
         pg.draw.rect(screen, (255, 0, 0), battle_area)  # 赤い背景を描画
 
+        # 待機中のキャラクターを上下に揺らす
+        bob = round(3 * math.sin(now / 200))
+
         # プレイヤー画像を描画
-        player_rect = player_img.get_rect(center=(300, 250))
-        screen.blit(pg.transform.scale(player_img, (80, 80)), player_rect)
+        screen.blit(assets.scaled(self.player_path, (80, 80)), self.player_rect.move(0, bob))
 
         # 敵画像を描画
-        enemy_rect = enemy_img.get_rect(center=(500, 250))
-        screen.blit(pg.transform.scale(enemy_img, (80, 80)), enemy_rect)
+        screen.blit(assets.scaled(self.enemy_path, (80, 80)), self.enemy_rect.move(0, -bob))
 
         # UIの描画
-        draw_battle_ui(screen, ui_buttons, ui_area, used_actions)
-        draw_battle_log(screen, log_area, battle_logs)
+        draw_battle_ui(screen, self.ui_buttons, self.ui_area, self.engine.used_actions)
+        draw_battle_log(screen, self.log_area, self.battle_logs)
 
         pg.display.update()
 
-        if is_player_turn:
-            action = decide_player_action(player, ui_buttons, used_actions, battle_logs)
-            if action == "attack":
-                enemy.take_damage(player.atk)
-                battle_logs.append(f"Player attacks! Enemy HP: {enemy.hp}")
-            elif isinstance(action, Skill):
-                if player.use_mana(action.mana_cost):
-                    action.use(player, enemy)
-                    txt_action = f"Player used {action.name}!  "
-                    txt_mana = f"(Player Mana: {player.mp} remained)"
-                    txt = txt_action + txt_mana
-                    battle_logs.append(txt)
-
-            elif action == "end_turn":
-                is_player_turn = False
-                used_actions = {"attack": False, "skills": set()}
-        else:
-            # 敵のターン
-            enemy_turn(enemy, player, battle_logs)
-            is_player_turn = True
-
-        pg.time.wait(500)
-
-    if player.hp > 0:  # プレイヤーが勝利した場合
-        stat_to_increase = random.choice(["atk", "def_", "hp", "mp"])
-        if stat_to_increase == "atk":
-            player.atk += 3
-            battle_logs.append("Your Attack increased by 3!")
-        elif stat_to_increase == "def_":
-            player.def_ += 3
-            battle_logs.append("Your Defense increased by 3!")
-        elif stat_to_increase == "hp":
-            player.hp += 10
-            battle_logs.append("Your HP increased by 10!")
-        elif stat_to_increase == "mp":
-            player.mp += 5
-            battle_logs.append("Your MP increased by 5!")
-
-
-
 
 def draw_battle_log(screen, log_area, logs):
     screen.fill((0, 0, 0), log_area)  # ログエリアを黒で塗りつぶす
-    font = pg.font.Font(None, 24)
-    for i, log in enumerate(logs[-5:]):  # 最新5件のログを表示
-        log_surface = font.render(log, True, WHITE)
+    for i, log in enumerate(logs.tail(5)):  # 最新5件のログを表示
+        log_surface = assets.text(log, 24, WHITE)  # 変わっていない行は描画済みの画像を使う
         screen.blit(log_surface, (log_area.left + 10, log_area.top + i * 20))
 
-def decide_player_action(player, ui_buttons, used_actions, battle_logs):
-    selected_action = None
-
-    while selected_action is None:
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
-                pg.quit()
-                sys.exit()
-            if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:  # 左クリック
-                mouse_pos = event.pos
-                for button in ui_buttons:
-                    if button["rect"].collidepoint(mouse_pos):
-                        action = button["action"]
-                        if action == "attack" and not used_actions["attack"]:
-                            used_actions["attack"] = True
-                            return "attack"
-                        elif isinstance(action, Skill) and action not in used_actions["skills"]:
-                            used_actions["skills"].add(action)
-                            if player.mp <= action.mana_cost :
-                                battle_logs.append(f"(Failure : This skill requires more mana than you currently have. )")
-                            return action
-                        elif action == "end_turn":
-                            return "end_turn"
-
-
 def create_battle_ui(player):
     ui_buttons = []
     ui_area = pg.Rect(20, 20, 160, WINDOW_HEIGHT - 40)
@@ -410,7 +335,6 @@ def create_buff_ui():
 def draw_battle_ui(screen, ui_buttons, ui_area, used_actions):
     pg.draw.rect(screen, (50, 50, 50), ui_area)  # UI背景
 
-    font = pg.font.Font(None, 24)
     for button in ui_buttons:
         color = button["color"]
         if button["action"] == "attack" and used_actions["attack"]:
@@ -419,175 +343,456 @@ def draw_battle_ui(screen, ui_buttons, ui_area, used_actions):
             color = (100, 100, 100)  # 使用済みスキルは暗く表示
 
         pg.draw.rect(screen, color, button["rect"])
-        text_surface = font.render(button["text"], True, (255, 255, 255))
+        text_surface = assets.text(button["text"], 24, WHITE)
         text_rect = text_surface.get_rect(center=button["rect"].center)
         screen.blit(text_surface, text_rect)
 
 def draw_buff_ui(screen, ui_buttons, ui_area):
     pg.draw.rect(screen, (50, 50, 50), ui_area)  # UI背景
-    font = pg.font.Font(None, 36)
 
     for button in ui_buttons:
         pg.draw.rect(screen, button["color"], button["rect"])
-        text_surface = font.render(button["text"], True, (255, 255, 255))
+        text_surface = assets.text(button["text"], 36, WHITE)
         text_rect = text_surface.get_rect(center=button["rect"].center)
         screen.blit(text_surface, text_rect)
 
 
-def enemy_turn(enemy, player, battle_logs):
-    if isinstance(enemy, Boss):
-        # ボスのスキル使用
-        skill = random.choice(enemy.skills)
-        skill.effect(enemy, player)
-        txt_skill = f"Boss used {skill.name}!  "
-        used_skill = skill.name
-
-    # 敵のスキル使用
-    if enemy.skills:
-        while True:
-            skill = random.choice(enemy.skills)
-            if skill.name != enemy.previous_skill :
-                break
-        skill.use(enemy, player)
-        txt_skill = f"Enemy used {skill.name}!  "
-        used_skill = skill.name
-
-    # 通常攻撃
-    damage = max(0, enemy.atk - player.def_)
-    player.take_damage(enemy.atk)
-    txt_attack = f"{'Boss' if isinstance(enemy, Boss) else 'Enemy'} attacks! Player HP: {player.hp}"
-    txt = txt_skill + txt_attack  # 2つの文字列を同じ行に追加
-    battle_logs.append(txt)
-    enemy.previous_skill = used_skill  #このターンで使ったに更新
-
-def handle_buff_ui(screen, player):
-    ui_buttons, ui_area = create_buff_ui()
-
-    while True:
+# 強化マスのシーン（選択肢を1度描いたら、クリックされるまで眠る）
+class BuffScene(Scene):
+    def __init__(self, player, rng=random):
+        super().__init__()
+        self.player = player
+        self.rng = rng
+        self.ui_buttons, self.ui_area = create_buff_ui()
+
+    def handle_event(self, event):
+        if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:  # 左クリック
+            for button in self.ui_buttons:
+                if button["rect"].collidepoint(event.pos):
+                    apply_buff(self.player, button["action"], self.rng)
+                    self.manager.pop()  # 選択が終わったら終了
+                    return
+
+    def draw(self, screen, now):
         screen.fill((0, 0, 0))  # 背景を黒でリセット
-        draw_buff_ui(screen, ui_buttons, ui_area)
+        draw_buff_ui(screen, self.ui_buttons, self.ui_area)
         pg.display.update()
 
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
-                pg.quit()
-                sys.exit()
-            if event.type == pg.MOUSEBUTTONDOWN and event.button == 1:  # 左クリック
-                mouse_pos = event.pos
-                for button in ui_buttons:
-                    if button["rect"].collidepoint(mouse_pos):
-                        if button["action"] == "add_skill":
-                            new_skill = random.choice(skill_pool)
-                            player.skills.append(new_skill)
-                            print(f"New skill added: {new_skill.name}")
-                        elif button["action"] == "increase_stat":
-                            stat_to_increase = random.choice(["atk", "def_", "hp", "mp"])
-                            if stat_to_increase == "atk":
-                                player.atk += 5
-                                print("Attack increased by 5!")
-                            elif stat_to_increase == "def_":
-                                player.def_ += 5
-                                print("Defense increased by 5!")
-                            elif stat_to_increase == "hp":
-                                player.hp += 20
-                                print("HP increased by 20!")
-                            elif stat_to_increase == "mp":
-                                player.mp += 10
-                                print("MP increased by 10!")
-                        return  # 選択が終わったら終了
-
-def handle_heal(player):
-    max_hp = 100  # プレイヤーの最大HP（必要に応じて変更可能）
-    player.hp = max_hp
-    print("Player's HP has been fully restored!")
-
-
-def main():
-    pg.display.set_caption("たたかえ！こうかとん")
-    screen = pg.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    clock = pg.time.Clock()
-    bg_img = pg.image.load("fig/pg_bg.jpg")
-    bg_img = pg.transform.scale(bg_img, (WINDOW_WIDTH, WINDOW_HEIGHT))  # 背景画像をウィンドウ全体に拡大
+# 回復マスのシーン（回復したらすぐに探索へ戻る）
+class HealScene(Scene):
+    def __init__(self, player):
+        super().__init__()
+        self.player = player
 
-    player_img = pg.image.load("fig/3.png")  # プレイヤー画像をロード
-    enemy_img = pg.image.load("fig/alien1.png")   # 敵画像
-    player = Player()  # プレイヤーのステータスを初期化
+    def enter(self):
+        handle_heal(self.player)  # HPを全回復
+        self.manager.pop()
 
-    while True:
-        # 迷路生成
-        maze = generate_maze(WIDTH, HEIGHT)
-        events = generate_event_tiles(maze)
 
-        # プレイヤーの初期位置
-        player_pos = get_random_start(maze, events)
+# 矢印キーと移動方向
+DIRECTIONS = {
+    pg.K_UP: (0, -1),
+    pg.K_DOWN: (0, 1),
+    pg.K_LEFT: (-1, 0),
+    pg.K_RIGHT: (1, 0),
+}
 
+# 探索シーン
+# キー入力は届いた時点で処理し、描画はマネージャのフレーム間隔で行う。
+# 押しっぱなしの連続移動はタイマーで、移動中の補間はアニメーションで描く
+class ExplorationScene(Scene):
+    def __init__(self, screen, player, bg_img, player_img, rng=random, log_writer=None, prefetch=FLOOR_PREFETCH,
+                 maze_algorithm=MAZE_ALGORITHM, fog=FOG_OF_WAR):
+        super().__init__()
+        self.player = player
+        self.rng = rng  # この1回のプレイで使う乱数（シード付きなら再現できる）
+        self.enemy_ai = ExpectimaxAI(ENEMY_AI_BUDGET_MS, ENEMY_AI_DEPTH)  # 置換表は戦闘をまたいで使い回す
+        self.log_writer = log_writer  # 戦闘ログの全文の書き出し先（Noneなら書き出さない）
         # 迷路の描画位置を中央に計算
-        offset_x = (WINDOW_WIDTH - WIDTH * CELL_SIZE) // 2
-        offset_y = (WINDOW_HEIGHT - HEIGHT * CELL_SIZE) // 2
-
-        boss_spawned = False
-
-        tmr = 0
-        while True:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    pg.quit()
-                    sys.exit()
-                if event.type == pg.KEYDOWN:
-                    direction = None
-                    if event.key == pg.K_UP:
-                        direction = (0, -1)
-                    elif event.key == pg.K_DOWN:
-                        direction = (0, 1)
-                    elif event.key == pg.K_LEFT:
-                        direction = (-1, 0)
-                    elif event.key == pg.K_RIGHT:
-                        direction = (1, 0)
-
-                    if direction:
-                        result = move_player(player_pos, direction, maze, events)
-                        if isinstance(result, tuple):
-                            if result[0] == "heal":
-                                new_x, new_y = result[1], result[2]
-                                handle_heal(player)  # HPを全回復
-                                del events[(new_x, new_y)]  # 回復マスを削除
-                            elif result[0] == "battle":
-                                new_x, new_y = result[1], result[2]
-                                enemy = random.choice(generate_enemy_patterns())
-                                log_area = pg.Rect(200, WINDOW_HEIGHT - 100, WINDOW_WIDTH - 200, 100)
-                                ui_buttons, ui_area = create_battle_ui(player)
-                                start_battle(screen, player, enemy, ui_buttons, ui_area, log_area)
-                                del events[(new_x, new_y)]  # 戦闘マスを削除
-                            elif result[0] == "boss":
-                                new_x, new_y = result[1], result[2]
-                                boss = Boss()
-                                log_area = pg.Rect(200, WINDOW_HEIGHT - 100, WINDOW_WIDTH - 200, 100)
-                                ui_buttons, ui_area = create_battle_ui(player)
-                                start_battle(screen, player, boss, ui_buttons, ui_area, log_area)
-                                del events[(new_x, new_y)]  # ボスマスを削除
-                            elif result[0] == "buff":
-                                new_x, new_y = result[1], result[2]
-                                handle_buff_ui(screen, player)  # 強化マスUIを表示
-                                del events[(new_x, new_y)]  # 強化マスを削除
-                            else:
-                                player_pos = result  # 通常移動
-
-            else:
-                if not boss_spawned and all(e != "battle" for e in events.values()):
-                    spawn_boss_tile(maze, events)
-                    boss_spawned = True
-
-                screen.blit(bg_img, (0, 0))  # 背景画像をウィンドウ全体に表示
-                draw_maze(screen, maze, bg_img, offset_x, offset_y, events)
-                draw_player(screen, player_img, player_pos, offset_x, offset_y)
-                pg.display.update()
-                tmr += 1
-                clock.tick(10)
+        self.offset_x = (WINDOW_WIDTH - WIDTH * CELL_SIZE) // 2
+        self.offset_y = (WINDOW_HEIGHT - HEIGHT * CELL_SIZE) // 2
+        self.player_img = player_img
+        self.layer = MazeLayer(screen, bg_img)
+        # 次の階層は別スレッドで先に作り、静的レイヤーまで描いておく
+        self.prefetch = prefetch
+        self.maze_algorithm = maze_algorithm
+        self.fog = fog
+        self.fov = None  # 今の階層の視界（霧なしなら None）
+        self.event_field = None  # 今の階層の（霧があれば見えた）イベントマスからの道のり
+        self.route = []  # クリック移動・自動探索でこれから進むマス（次のマスが末尾）
+        self.route_id = 0  # 古い自動移動タイマーを無視するための番号
+        self.floors = self.floor_pipeline(random.Random(rng.getrandbits(64)))
+        self.floor = None
+        self.save_path = None  # 階層が変わるたびにセーブするファイル
+        self.restored = None  # 読み込んだセーブデータ（enter で階層を復元する）
+        self.pending_tile = None  # 処理中のイベントマス（シーンから戻ったら削除する）
+        self.held_key = None  # 押しっぱなしの矢印キー
+        self.repeat_id = 0  # 古い連続移動タイマーを無視するための番号
+        self.move_from = None  # 補間の開始位置
+        self.move_start = 0
+        self.tween_done = True
+
+    @property
+    def animating(self):
+        return not self.tween_done
+
+    def floor_pipeline(self, floor_rng, number=0):
+        return FloorPipeline(WIDTH, HEIGHT, floor_rng, self.prefetch,
+                             lambda f: self.layer.render(f.maze, f.events, self.offset_x, self.offset_y), number,
+                             self.maze_algorithm)
+
+    def enter(self):
+        if self.restored is not None:
+            self.restore_floor(self.restored)
+        else:
+            self.new_floor()
+
+    def snapshot(self):
+        return Snapshot(self.floor.number, self.maze, self.events, self.player_pos, self.player,
+                        self.boss_spawned, self.rng.getstate(), self.floor.rng_state)
+
+    def restore(self, snapshot):
+        """セーブデータから再開する（シーンを積む前に呼ぶ）"""
+        self.rng.setstate(snapshot.rng_state)
+        floor_rng = random.Random()
+        floor_rng.setstate(snapshot.floor_rng_state)
+        self.floors.close()
+        self.floors = self.floor_pipeline(floor_rng, snapshot.floor_number)
+        self.player = snapshot.player
+        self.restored = snapshot
+
+    def restore_floor(self, snapshot):
+        self.floor = Floor(snapshot.floor_number, snapshot.maze, snapshot.events, snapshot.player_pos)
+        self.floor.rng_state = snapshot.floor_rng_state
+        self.maze, self.events = snapshot.maze, snapshot.events
+        self.player_pos = self.move_from = snapshot.player_pos
+        self.tween_done = True
+        self.fov = FieldOfView(self.maze) if self.fog else None
+        self.event_field = DistanceField(self.maze, self.events if self.fov is None else ())
+        self.route = []
+        self.layer.rebuild(self.maze, self.events, self.offset_x, self.offset_y, fov=self.fov)
+        self.update_fov()
+        self.boss_spawned = snapshot.boss_spawned
+        self.needs_redraw = True
+        self.restored = None
+        print(f"Floor {self.floor.number} (loaded)")
+
+    def new_floor(self):
+        # 先読み済みの階層を受け取る（迷路・イベントマス・初期位置・静的レイヤー）
+        self.floor = self.floors.next_floor()
+        self.maze = self.floor.maze
+        self.events = self.floor.events
+        self.player_pos = self.floor.start
+        self.move_from = self.player_pos
+        self.tween_done = True
+        self.fov = FieldOfView(self.maze) if self.fog else None
+        self.event_field = DistanceField(self.maze, self.events if self.fov is None else ())
+        self.route = []
+        self.layer.rebuild(self.maze, self.events, self.offset_x, self.offset_y, self.floor.surface, self.fov)
+        self.update_fov()
+        self.boss_spawned = False
+        self.needs_redraw = True
+        print(f"Floor {self.floor.number}")
+        if self.save_path:
+            save(self.save_path, self.snapshot())
+
+    def resume(self):
+        # イベントマスのシーンから戻ったら、そのマスを削除する
+        if self.pending_tile is not None:
+            if self.events[self.pending_tile] == "boss" and self.player.hp > 0:
+                # ボスを倒したら次の階層へ
+                self.pending_tile = None
+                self.new_floor()
+                super().resume()
+                return
+            del self.events[self.pending_tile]
+            self.event_field.remove_source(*self.pending_tile)
+            self.layer.refresh_cell(*self.pending_tile)
+            self.pending_tile = None
+        self.layer.invalidate()
+        super().resume()
+
+    def invalidate(self):
+        self.layer.invalidate()
+        super().invalidate()
+
+    def handle_event(self, event):
+        if event.type == pg.KEYUP and event.key == self.held_key:
+            self.held_key = None
+        elif event.type == pg.KEYDOWN and event.key in DIRECTIONS:
+            self.held_key = event.key
+            self.repeat_id += 1
+            self.follow([])  # 矢印キーを押したら自動移動をやめる
+            self.step(DIRECTIONS[event.key])
+            if KEY_REPEAT_INTERVAL and self.held_key is not None:
+                self.manager.after(KEY_REPEAT_DELAY, lambda key=event.key, rid=self.repeat_id: self.repeat(key, rid))
+        elif event.type == pg.KEYDOWN and event.key == AUTO_EXPLORE_KEY and self.event_field is not None:
+            route = self.event_field.path(*self.player_pos)  # 表をたどるだけで探索はしない
+            self.follow(route or self.frontier_route())
+        elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1 and self.event_field is not None:
+            self.walk_to(self.cell_at(event.pos))
+
+    def cell_at(self, pos):
+        x = (pos[0] - self.offset_x) // CELL_SIZE
+        y = (pos[1] - self.offset_y) // CELL_SIZE
+        if not self.maze.is_path(x, y):
+            return None
+        if self.fov is not None and self.fov.state(x, y) == UNSEEN:
+            return None  # 霧の中のマスはクリックできない
+        return x, y
+
+    def walk_to(self, cell):
+        # クリックしたマスからの道のりを一度だけ求め、その表をたどって歩く
+        if cell is not None and cell != self.player_pos:
+            self.follow(DistanceField(self.maze, [cell]).path(*self.player_pos))
+
+    def frontier_route(self):
+        # 行ける見えたイベントマスがなければ、まだ見ていない道に接する一番近いマスへ向かう。
+        # 一番近い境目までの最短の道は、見たことのあるマスだけを通る
+        if self.fov is None:
+            return []
+        field = DistanceField(self.maze, [self.player_pos])
+        width, state, is_path = self.maze.width, self.fov.state, self.maze.is_path
+        best = None
+        for i, d in enumerate(field.dist):
+            if d <= 0 or best is not None and d >= field.dist[best]:
                 continue
+            x, y = i % width, i // width
+            if state(x, y) != UNSEEN and any(is_path(nx, ny) and state(nx, ny) == UNSEEN
+                                             for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))):
+                best = i
+        if best is None:
+            return []
+        target = (best % width, best // width)
+        return field.path(*target)[-2::-1] + [target]  # 始点（今の位置）を除いて向きを逆にする
+
+    def follow(self, route):
+        self.route = route[::-1]
+        self.route_id += 1
+        if self.route:
+            self.held_key = None
+            self.advance(self.route_id)
+
+    def advance(self, route_id):
+        # 道順の次のマスへ1歩進み、残りがあればタイマーで続ける
+        if route_id != self.route_id or not self.route or self.manager.top is not self:
+            return
+        x, y = self.route.pop()
+        self.step((x - self.player_pos[0], y - self.player_pos[1]))
+        if self.route:
+            self.manager.after(AUTO_MOVE_INTERVAL, lambda: self.advance(route_id))
+
+    def repeat(self, key, repeat_id):
+        # 同じキーが押されたままで、このシーンが一番上のときだけ連続移動する
+        if key != self.held_key or repeat_id != self.repeat_id or self.manager.top is not self:
+            return
+        self.step(DIRECTIONS[key])
+        if self.held_key is not None:
+            self.manager.after(KEY_REPEAT_INTERVAL, lambda: self.repeat(key, repeat_id))
+
+    def visual_pos(self, now):
+        # 補間中の描画位置（マス単位の小数）
+        if self.tween_done or not MOVE_TWEEN_MS:
+            return self.player_pos
+        t = min(1.0, (now - self.move_start) / MOVE_TWEEN_MS)
+        (fx, fy), (tx, ty) = self.move_from, self.player_pos
+        return fx + (tx - fx) * t, fy + (ty - fy) * t
+
+    def step(self, direction):
+        result = move_player(self.player_pos, direction, self.maze, self.events)
+        if isinstance(result[0], str):
+            new_x, new_y = result[1], result[2]
+            self.pending_tile = (new_x, new_y)
+            self.held_key = None  # イベント画面に入ったら連続移動・自動移動をやめる
+            self.route = []
+            if result[0] == "heal":
+                self.manager.push(HealScene(self.player))
+            elif result[0] == "battle":
+                self.manager.push(BattleScene(self.player, spawn_enemy(rng=self.rng), self.rng,
+                                               self.enemy_ai, self.log_writer))
+            elif result[0] == "boss":
+                self.manager.push(BattleScene(self.player, Boss(rng=self.rng), self.rng,
+                                               self.enemy_ai, self.log_writer))
+            elif result[0] == "buff":
+                self.manager.push(BuffScene(self.player, self.rng))  # 強化マスUIを表示
+        elif result != self.player_pos:
+            now = self.manager.ticks()
+            self.move_from = self.visual_pos(now)
+            self.move_start = now
+            self.tween_done = not MOVE_TWEEN_MS
+            self.player_pos = result  # 通常移動
+            self.update_fov()
+            self.needs_redraw = True
+
+    def update_fov(self):
+        # 位置が変わったときだけ視界を求め直し、見え方が変わったマスを静的レイヤーに写す
+        if self.fov is not None:
+            changed = self.fov.update(self.player_pos)
+            self.layer.reveal(changed)
+            for cell in changed:
+                if cell in self.events:
+                    self.event_field.add_source(*cell)  # 見えたイベントマスを自動移動の行き先に加える
+
+    def update(self, now):
+        if not self.boss_spawned and all(e != "battle" for e in self.events.values()):
+            # 初期位置から遠く、今プレイヤーがいないマスに置く
+            boss = spawn_boss_tile(self.maze, self.events, self.rng, self.floor.start, self.player_pos)
+            if self.fov is None or self.fov.state(*boss) != UNSEEN:
+                self.event_field.add_source(*boss)  # 霧の中なら見えたときに加える
+            self.layer.refresh_cell(*boss)
+            self.boss_spawned = True
+            self.needs_redraw = True
+
+    def draw(self, screen, now):
+        pos = self.visual_pos(now)
+        self.tween_done = pos == self.player_pos
+        self.layer.present(screen, self.player_img, pos)  # 変化したマスだけを画面に反映
+
+
+# F3 のプロファイラで計測する描画関数
+for name in ("draw_maze", "draw_world", "draw_player", "draw_battle_ui", "draw_battle_log"):
+    profiler.watch(sys.modules[__name__], name)
+
+
+# 広いワールドの探索シーン
+# 階層の代わりに world_chunks x world_chunks チャンクのワールドを歩き、
+# カメラはプレイヤーを中心に追う。ボスは右下のチャンクにいる
+class WorldScene(ExplorationScene):
+    def __init__(self, screen, player, bg_img, player_img, rng=random, log_writer=None, world_chunks=8,
+                 maze_algorithm=MAZE_ALGORITHM):
+        self.world_chunks = world_chunks
+        self.bg_img = bg_img
+        self.world = None
+        super().__init__(screen, player, bg_img, player_img, rng, log_writer, 0, maze_algorithm, fog=False)
+
+    def new_floor(self):
+        self.world = ChunkedWorld(self.world_chunks, self.world_chunks, self.rng.getrandbits(64),
+                                  algorithm=self.maze_algorithm)
+        self.maze = self.world  # move_player は maze[y][x] と events でワールドを読む
+        self.events = self.world.events
+        self.player_pos = self.world.start
+        self.move_from = self.player_pos
+        self.tween_done = True
+        self.boss_spawned = True  # ボスは最初から置いてある
+        self.needs_redraw = True
+
+    def resume(self):
+        if self.pending_tile is not None:
+            if self.events[self.pending_tile] == "boss" and self.player.hp > 0:
+                self.new_floor()  # ボスを倒したら新しいワールドへ
+            else:
+                del self.events[self.pending_tile]
+            self.pending_tile = None
+        Scene.resume(self)
+
+    def invalidate(self):
+        Scene.invalidate(self)
+
+    def update(self, now):
+        # プレイヤーの周りのチャンクだけをメモリに置く
+        self.world.retain_around(*self.player_pos)
+
+    def camera(self, pos):
+        # プレイヤーが画面の中央に来るように、ワールドの端では止める
+        x = pos[0] * CELL_SIZE + CELL_SIZE / 2 - WINDOW_WIDTH / 2
+        y = pos[1] * CELL_SIZE + CELL_SIZE / 2 - WINDOW_HEIGHT / 2
+        x = max(0, min(x, self.world.width * CELL_SIZE - WINDOW_WIDTH))
+        y = max(0, min(y, self.world.height * CELL_SIZE - WINDOW_HEIGHT))
+        return x, y
+
+    def draw(self, screen, now):
+        pos = self.visual_pos(now)
+        self.tween_done = pos == self.player_pos
+        camera_x, camera_y = self.camera(pos)
+        draw_world(screen, self.world, self.bg_img, camera_x, camera_y)
+        draw_player(screen, self.player_img, pos, -camera_x, -camera_y)
+        pg.display.update()
+
+
+def start_game(manager, rng, log_writer=None, prefetch=FLOOR_PREFETCH, world_chunks=0,
+               save_path=None, snapshot=None, maze_algorithm=MAZE_ALGORITHM, fog=FOG_OF_WAR):
+    # 探索シーンを積んでゲームを始める（リプレイからも使う）
+    screen = manager.screen
+    bg_img = assets.scaled("fig/pg_bg.jpg", (WINDOW_WIDTH, WINDOW_HEIGHT))  # 背景画像をウィンドウ全体に拡大
+
+    player_img = assets.scaled("fig/3.png", (CELL_SIZE, CELL_SIZE))  # プレイヤー画像をマスの大きさでロード
+    player = Player(rng=rng)  # プレイヤーのステータスを初期化
+
+    if world_chunks:
+        exploration = WorldScene(screen, player, bg_img, player_img, rng, log_writer, world_chunks, maze_algorithm)
+    else:
+        exploration = ExplorationScene(screen, player, bg_img, player_img, rng, log_writer, prefetch,
+                                       maze_algorithm, fog)
+        exploration.save_path = save_path
+        if snapshot is not None:
+            exploration.restore(snapshot)
+    manager.push(exploration)
+    return exploration
+
+
+def main(seed=None, record_path=None, profile_path=None, battle_log_path=BATTLE_LOG_PATH,
+         prefetch=FLOOR_PREFETCH, world_chunks=0, save_path=None, load_path=None,
+         maze_algorithm=MAZE_ALGORITHM, fog=FOG_OF_WAR):
+    pg.display.set_caption("たたかえ！こうかとん")
+    screen = pg.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    print(f"seed: {seed}")
+    manager = SceneManager(screen, FPS)
+    snapshot = load(load_path) if load_path else None
+    if record_path:
+        settings = {"world_chunks": world_chunks, "maze_algorithm": maze_algorithm, "fog": fog}
+        if snapshot is not None:
+            # セーブデータから再開したときは、リプレイでも同じ状態から始められるように一緒に記録する
+            settings["snapshot"] = base64.b64encode(encode(snapshot)).decode("ascii")
+        manager.recorder = InputRecorder(seed, manager.ticks(), settings)
+    if profile_path:
+        manager.profile_path = profile_path
+        profiler.enable()
+    log_writer = LogWriter(battle_log_path) if battle_log_path else None
+    exploration = start_game(manager, random.Random(seed), log_writer, prefetch, world_chunks,
+                             save_path, snapshot, maze_algorithm, fog)
+    manager.run()
+    exploration.floors.close()
+    if log_writer is not None:
+        log_writer.close()
+
+    if record_path:
+        manager.recorder.save(record_path)
+    if profile_path:
+        profiler.dump(profile_path)
+    latency = manager.input_latency.summary()
+    if latency["count"]:
+        print(f"input latency: p50 {latency['p50_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms "
+              f"(frame {1000 / FPS:.1f} ms)")
+    ai = exploration.enemy_ai.stats()
+    if ai["searches"]:
+        print(f"enemy ai: {ai['ms_per_search']:.2f} ms/turn, {ai['nodes_per_sec']:.0f} nodes/s, "
+              f"cache hit rate {ai['hit_rate']:.2f}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="乱数のシード（同じシードなら同じ迷路になる）")
+    parser.add_argument("--record", metavar="PATH", help="キー・クリック入力を記録するファイル")
+    parser.add_argument("--profile", metavar="PATH", help="最初から計測して終了時にフレーム時間を書き出す（.json/.csv）")
+    parser.add_argument("--battle-log", metavar="PATH", default=BATTLE_LOG_PATH,
+                        help="戦闘ログを追記するファイル（空文字なら書き出さない）")
+    parser.add_argument("--prefetch", type=int, default=FLOOR_PREFETCH,
+                        help="別スレッドで先に作っておく階層の数（0なら階層の切り替え時に作る）")
+    parser.add_argument("--world", type=int, default=0, metavar="N",
+                        help="11x11の階層の代わりに NxN チャンク（1チャンク64x64マス）の広いワールドを歩く")
+    parser.add_argument("--save", metavar="PATH", help="階層が変わるたびにプレイ状態をセーブするファイル")
+    parser.add_argument("--load", metavar="PATH", help="セーブデータから再開する")
+    parser.add_argument("--maze", choices=list(MAZE_ALGORITHMS), default=MAZE_ALGORITHM,
+                        help="迷路の生成アルゴリズム")
+    parser.add_argument("--no-fog", action="store_true", help="視界の外のマスも表示する")
+    args = parser.parse_args()
+    if args.world and (args.save or args.load):
+        parser.error("--save/--load cannot be used with --world")
     pg.init()
-    main()
+    main(args.seed, args.record, args.profile, args.battle_log, args.prefetch, args.world,
+         args.save, args.load, args.maze, not args.no_fog)
     pg.quit()
     sys.exit()
@@ -0,0 +1,132 @@
+"""ゲームサーバーの負荷試験クライアント
+
+指定した数のボットを同時に接続し、それぞれが状態に応じて移動・戦闘・強化の
+要求を送り続ける。要求から応答までの時間（1手の遅延）の p50/p99 と、
+サーバーのCPU時間から求めた「CPU 1コアあたりのセッション数」を表示する。
+アドレスを指定しなければ server.py を子プロセスで起動する。
+
+    python load_test.py --sessions 200 --turns 500
+    python load_test.py --connect 127.0.0.1:7777
+"""
+import argparse
+import asyncio
+import os
+import random
+import struct
+import subprocess
+import sys
+import time
+
+from server import FRAME, OK, OP_ACT, OP_BUFF, OP_HELLO, OP_MOVE, OP_STATS, STATS
+from session import END_TURN, MODE_BATTLE, MODE_BUFF, MODE_DEAD, STATE
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, payload):
+        self.writer.write(FRAME.pack(len(payload)) + payload)
+        (size,) = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+        return await self.reader.readexactly(size)
+
+
+async def connect(address):
+    if address.startswith("unix:"):
+        reader, writer = await asyncio.open_unix_connection(address[5:])
+    else:
+        host, port = address.rsplit(":", 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+    return Client(reader, writer)
+
+
+async def bot(address, seed, turns, latencies):
+    # 探索中はランダムに歩き、戦闘では通常攻撃してからターンを終え、強化はランダムに選ぶ
+    client = await connect(address)
+    rng = random.Random(seed)
+    clock = time.perf_counter
+    start = clock()
+    reply = await client.request(struct.pack("<BQ", OP_HELLO, seed))
+    latencies.append(clock() - start)
+    mode = STATE.unpack_from(reply, 1)[0]
+    attacked = False
+    for _ in range(turns):
+        if mode == MODE_BATTLE:
+            action = END_TURN if attacked else 0
+            attacked = not attacked
+            payload = bytes([OP_ACT, action])
+        elif mode == MODE_BUFF:
+            payload = bytes([OP_BUFF, rng.randrange(2)])
+        elif mode == MODE_DEAD:
+            seed += 1_000_003  # 倒れたら新しいセッションでやり直す
+            payload = struct.pack("<BQ", OP_HELLO, seed)
+        else:
+            payload = bytes([OP_MOVE, rng.randrange(4)])
+        start = clock()
+        reply = await client.request(payload)
+        latencies.append(clock() - start)
+        if reply[0] != OK and mode == MODE_BATTLE:
+            attacked = True  # 攻撃できなかったら次はターンを終える
+        mode = STATE.unpack_from(reply, 1)[0]
+    client.writer.close()
+
+
+async def server_stats(address):
+    client = await connect(address)
+    reply = await client.request(bytes([OP_STATS]))
+    client.writer.close()
+    return STATS.unpack_from(reply, 1)
+
+
+async def run(address, sessions, turns):
+    _, _, requests_before, cpu_before = await server_stats(address)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(bot(address, seed, turns, latencies) for seed in range(sessions)))
+    wall = time.perf_counter() - start
+    _, total_sessions, requests_after, cpu_after = await server_stats(address)
+
+    latencies.sort()
+    cpu = cpu_after - cpu_before
+    utilization = cpu / wall if wall else 0.0
+    requests = requests_after - requests_before
+    print(f"{sessions} sessions x {turns} turns: {requests} requests in {wall:.2f} s "
+          f"({requests / wall:.0f} req/s)")
+    print(f"turn latency: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[len(latencies) * 99 // 100] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print(f"server cpu: {cpu:.2f} s ({utilization * 100:.0f}% of one core), "
+          f"{cpu / requests * 1e6:.1f} us/request")
+    if utilization:
+        print(f"sessions per core at this pace: {sessions / utilization:.0f}")
+
+
+def start_server():
+    # 空いているポートでサーバーを起動し、待ち受けのアドレスを読み取る
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                               "--port", "0"], stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline().strip()
+    return server, line.removeprefix("listening on ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ゲームサーバーの負荷試験")
+    parser.add_argument("--sessions", type=int, default=200, help="同時に接続するボットの数")
+    parser.add_argument("--turns", type=int, default=500, help="ボット1体あたりの要求数")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="起動済みのサーバー（unix:PATH も可）")
+    args = parser.parse_args()
+
+    server = None
+    address = args.connect
+    if address is None:
+        server, address = start_server()
+    try:
+        asyncio.run(run(address, args.sessions, args.turns))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
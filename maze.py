@@ -0,0 +1,117 @@
+"""迷路データと迷路生成、迷路上の移動
+
+迷路は1マス1バイトの bytearray に行優先で格納する（0: 道, 1: 壁）。
+maze[y][x] は行ごとの memoryview を返すので、リストのリストと同じ書き方で
+読み書きできる。
+"""
+import random
+from array import array
+
+WALL, PATH = 1, 0
+
+
+class MazeGrid:
+    def __init__(self, width, height, fill=WALL):
+        self.width = width
+        self.height = height
+        self.cells = bytearray([fill]) * (width * height)  # 行優先の1次元配列
+        view = memoryview(self.cells)
+        self.rows = [view[y * width:(y + 1) * width] for y in range(height)]  # 行ごとのビュー
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def is_path(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] == PATH
+
+    def tolist(self):
+        return [list(row) for row in self.rows]
+
+    def to_numpy(self):
+        """コピーせずに (height, width) の uint8 配列として見る（NumPyが必要）"""
+        import numpy as np
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height, self.width)
+
+    @classmethod
+    def from_rows(cls, rows):
+        maze = cls(len(rows[0]), len(rows))
+        for y, row in enumerate(rows):
+            maze.rows[y][:] = bytes(row)
+        return maze
+
+
+# 4方向の「まだ掘れる」ビットマスクから選択肢（方向番号）を引く表
+_CHOICES = [tuple(k for k in range(4) if mask >> k & 1) for mask in range(16)]
+
+
+# 迷路生成関数（穴掘り法）
+def generate_maze(width, height, rng=random):
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    rand = rng.random
+
+    # 掘る対象の奇数座標のマスだけを、周囲に番兵を置いた別の表で管理する
+    # （1: まだ掘っていない, 0: 掘った or 範囲外）ので範囲チェックが要らない
+    cw, ch = width // 2, height // 2
+    stride = cw + 2
+    unvisited = bytearray(stride * (ch + 2))
+    for cy in range(1, ch + 1):
+        unvisited[cy * stride + 1:cy * stride + 1 + cw] = b"\x01" * cw
+    steps = (-1, 1, -stride, stride)  # 表の上での移動量
+    carves = (-2, 2, -2 * width, 2 * width)  # 迷路の上での移動量
+
+    # 初期位置 (1, 1) から掘り始める
+    v, m = stride + 1, width + 1
+    unvisited[v] = 0
+    cells[m] = PATH
+    vstack, mstack = array("i", [v]), array("i", [m])
+
+    while vstack:
+        v = vstack[-1]
+        mask = (unvisited[v - 1] | unvisited[v + 1] << 1
+                | unvisited[v - stride] << 2 | unvisited[v + stride] << 3)
+        if mask:
+            options = _CHOICES[mask]
+            k = options[int(rand() * len(options))]
+            m = mstack[-1]
+            d = carves[k]
+            v += steps[k]
+            unvisited[v] = 0
+            cells[m + d // 2] = PATH
+            cells[m + d] = PATH
+            vstack.append(v)
+            mstack.append(m + d)
+        else:
+            vstack.pop()
+            mstack.pop()
+
+    return maze
+
+
+# プレイヤーの移動（画面に依存しないので、サーバーやワールドからも使う）
+def move_player(player_pos, direction, maze, events):
+    x, y = player_pos
+    dx, dy = direction
+    new_x, new_y = x + dx, y + dy  # 移動後の位置を計算
+
+    if 0 <= new_x < len(maze[0]) and 0 <= new_y < len(maze) and maze[new_y][new_x] == 0:
+        # イベントマスに到達した場合
+        if (new_x, new_y) in events:
+            event_type = events[(new_x, new_y)]
+            if event_type == "battle":
+                return "battle", new_x, new_y  # 戦闘マスのイベントを返す
+            elif event_type == "boss":
+                return "boss", new_x, new_y  # ボスマスのイベントを返す
+            elif event_type == "buff":
+                return "buff", new_x, new_y  # 強化マスのイベントを返す
+            elif event_type == "heal":
+                return "heal", new_x, new_y  # 回復マスのイベントを返す
+        return (new_x, new_y)  # 通常移動の場合
+
+    return player_pos  # 壁の場合は移動しない
@@ -0,0 +1,186 @@
+"""迷路生成アルゴリズムの切り替え
+
+どのアルゴリズムも maze.generate_maze（穴掘り法）と同じ形の迷路を作る。
+奇数座標のマスが部屋で、隣り合う部屋の間の壁を壊してつなぎ、どの2部屋の
+間にもちょうど1本の道がある（ループのない）迷路になる。
+
+    backtracker  穴掘り法。長い一本道が多い（maze.generate_maze）
+    kruskal      壁をランダムな順に見て、別々の木をつなぐ壁だけを壊す（Union-Find）
+    wilson       ループを消したランダムウォークで木を伸ばす。全域木から一様に選ぶ
+    eller        1行ずつ作る。メモリは幅に比例するだけなので、eller_rows で
+                 行を順に受け取れば迷路全体を持たずにファイルなどへ流せる
+"""
+import random
+from array import array
+
+from maze import PATH, WALL, MazeGrid, generate_maze
+
+MAZE_ALGORITHM = "backtracker"  # 既定のアルゴリズム
+
+
+def _find(parent, i):
+    # 経路を半分に縮めながら根をたどる
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def generate_maze_kruskal(width, height, rng=random):
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    cw, ch = width // 2, height // 2
+    for cy in range(ch):
+        y = 2 * cy + 1
+        cells[y * width + 1:y * width + 2 * cw:2] = bytes(cw)
+
+    # 壁を (部屋の番号, 向き) で並べてシャッフルする（0: 右の部屋との壁, 1: 下の部屋との壁）
+    walls = array("i")
+    for c in range(cw * ch):
+        if c % cw < cw - 1:
+            walls.append(c * 2)
+        if c < cw * (ch - 1):
+            walls.append(c * 2 + 1)
+    rng.shuffle(walls)
+
+    parent = array("i", range(cw * ch))
+    remaining = cw * ch - 1  # 全部の部屋がつながるまでにあと何枚壊すか
+    for wall in walls:
+        c, down = divmod(wall, 2)
+        other = c + cw if down else c + 1
+        a, b = _find(parent, c), _find(parent, other)
+        if a == b:
+            continue
+        parent[a] = b
+        cy, cx = divmod(c, cw)
+        cells[(2 * cy + 1 + down) * width + 2 * cx + 1 + (1 - down)] = PATH
+        remaining -= 1
+        if not remaining:
+            break
+    return maze
+
+
+def generate_maze_wilson(width, height, rng=random):
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    cw, ch = width // 2, height // 2
+    n = cw * ch
+    if n == 0:
+        return maze
+    in_tree = bytearray(n)
+    step = array("b", bytes(n))  # ランダムウォークで最後にそのマスから出た向き
+    moves = ((0, -1), (0, 1), (-1, 0), (1, 0))
+    rand = rng.random
+
+    def carve(c):
+        cy, cx = divmod(c, cw)
+        cells[(2 * cy + 1) * width + 2 * cx + 1] = PATH
+
+    first = rng.randrange(n)
+    in_tree[first] = 1
+    carve(first)
+    for start in range(n):
+        if in_tree[start]:
+            continue
+        # 木に当たるまで歩く。同じマスに戻ったら向きを上書きするのでループは自然に消える
+        c = start
+        while not in_tree[c]:
+            cy, cx = divmod(c, cw)
+            while True:
+                k = int(rand() * 4)
+                dx, dy = moves[k]
+                if 0 <= cx + dx < cw and 0 <= cy + dy < ch:
+                    break
+            step[c] = k
+            c += dy * cw + dx
+        # 記録した向きをたどって道を掘り、木に加える
+        c = start
+        while not in_tree[c]:
+            in_tree[c] = 1
+            carve(c)
+            cy, cx = divmod(c, cw)
+            dx, dy = moves[step[c]]
+            cells[(2 * cy + 1 + dy) * width + 2 * cx + 1 + dx] = PATH
+            c += dy * cw + dx
+    return maze
+
+
+def eller_rows(width, height, rng=random):
+    """Eller法の迷路を1行ずつ bytes で返すジェネレータ（メモリは幅に比例するだけ）"""
+    cw, ch = width // 2, height // 2
+    wall_row = bytes([WALL]) * width
+    if ch == 0:
+        for _ in range(height):
+            yield wall_row
+        return
+    yield wall_row
+    rand = rng.random
+    sets = [0] * cw  # 今の行の各部屋が属する集合（0: まだ決まっていない）
+    next_id = 1
+    for cy in range(ch):
+        last = cy == ch - 1
+        for x in range(cw):
+            if not sets[x]:
+                sets[x] = next_id
+                next_id += 1
+
+        # 横につなぐ：別の集合の隣同士をランダムに（最後の行は全部）つなぐ
+        parent = {}
+        row = bytearray(wall_row)
+        row[1:2 * cw:2] = bytes(cw)
+
+        def find(s):
+            while s in parent:
+                s = parent[s]
+            return s
+
+        for x in range(cw - 1):
+            a, b = find(sets[x]), find(sets[x + 1])
+            if a != b and (last or rand() < 0.5):
+                parent[b] = a
+                row[2 * x + 2] = PATH
+        sets = [find(s) for s in sets]
+        yield bytes(row)
+        if last:
+            break
+
+        # 下につなぐ：集合ごとに少なくとも1つの部屋を下の行へつなぐ
+        members = {}
+        for x, s in enumerate(sets):
+            members.setdefault(s, []).append(x)
+        below = bytearray(wall_row)
+        next_sets = [0] * cw
+        for s, xs in members.items():
+            keep = xs[int(rand() * len(xs))]
+            for x in xs:
+                if x == keep or rand() < 0.5:
+                    below[2 * x + 1] = PATH
+                    next_sets[x] = s
+        sets = next_sets
+        yield bytes(below)
+    if height % 2:  # 高さが奇数なら一番下は壁だけの行
+        yield wall_row
+
+
+def generate_maze_eller(width, height, rng=random):
+    maze = MazeGrid(width, height)
+    for y, row in enumerate(eller_rows(width, height, rng)):
+        maze.rows[y][:] = row
+    return maze
+
+
+MAZE_ALGORITHMS = {
+    "backtracker": generate_maze,
+    "kruskal": generate_maze_kruskal,
+    "wilson": generate_maze_wilson,
+    "eller": generate_maze_eller,
+}
+
+
+def maze_generator(name):
+    """アルゴリズムの名前から生成関数 (width, height, rng) を返す"""
+    try:
+        return MAZE_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"unknown maze algorithm: {name!r} "
+                         f"(choose from {', '.join(MAZE_ALGORITHMS)})") from None
@@ -0,0 +1,189 @@
+"""イベントマス・ボスマス・初期位置の配置
+
+置ける道マスの一覧を持ち、その中から重複なしのランダム順に候補を
+取り出すので、同じマスを二度調べることはなく、置ける場所がなくなった時点で
+PlacementError を送出して終わる（無限ループしない）。同じ種類のイベント同士の
+間隔は壁を回り込む道のりで測る。道のりはマンハッタン距離より短くならないので、
+イベントをマス目のバケツに分けて近くのバケツだけを見て、マンハッタン距離で
+近いものがあったときだけ、そのマスの周りを小さく探索する。
+"""
+import math
+import random
+from array import array
+
+from distance import DistanceField, within
+
+EVENT_SPACING = 2  # 同じ種類のイベント同士は道のりでこれより離す
+BOSS_FAR_RATIO = 0.75  # ボスは初期位置から最も遠いマスまでの道のりのこの割合以上離す
+
+
+class PlacementError(Exception):
+    """条件を満たす配置先が見つからなかった"""
+
+
+class PlacementIndex:
+    def __init__(self, maze, events=None, rng=random, spacing=EVENT_SPACING):
+        self.maze = maze
+        self.width, self.height = len(maze[0]), len(maze)
+        self.events = {} if events is None else events  # 配置結果はこの辞書に書き込む
+        self.rng = rng
+        self.spacing = spacing
+
+        # 外周を除いた、イベントのない道マスの通し番号
+        # free を入れ替えながら使うので、位置の逆引き表 pos も持つ
+        width = self.width
+        self.free = array("i")
+        for y in range(1, self.height - 1):
+            row = bytes(maze[y])
+            base = y * width
+            self.free.extend([base + x for x in range(1, width - 1) if not row[x]])
+        self.pos = array("i", [-1]) * (width * self.height)
+        for i, cell in enumerate(self.free):
+            self.pos[cell] = i
+        for x, y in self.events:
+            if self.pos[y * width + x] >= 0:
+                self._remove(y * width + x)
+
+        self.buckets = {}  # (種類, バケツx, バケツy) -> そのバケツ内のイベント座標
+        for (x, y), event_type in self.events.items():
+            self._add_to_bucket(x, y, event_type)
+
+    def __len__(self):
+        return len(self.free)
+
+    def _bucket(self, x, y, event_type):
+        size = self.spacing + 1  # 間隔チェックは隣のバケツまで見れば足りる
+        return event_type, x // size, y // size
+
+    def _add_to_bucket(self, x, y, event_type):
+        self.buckets.setdefault(self._bucket(x, y, event_type), []).append((x, y))
+
+    def _swap(self, i, j):
+        free, pos = self.free, self.pos
+        free[i], free[j] = free[j], free[i]
+        pos[free[i]] = i
+        pos[free[j]] = j
+
+    def _remove(self, cell):
+        i = self.pos[cell]
+        self._swap(i, len(self.free) - 1)
+        self.free.pop()
+        self.pos[cell] = -1
+
+    def is_spaced(self, x, y, event_type):
+        """同じ種類のイベントが道のりで spacing 以内にないか（近くの9バケツだけを調べる）"""
+        _, bx, by = self._bucket(x, y, event_type)
+        near = None
+        for nx in (bx - 1, bx, bx + 1):
+            for ny in (by - 1, by, by + 1):
+                for ex, ey in self.buckets.get((event_type, nx, ny), ()):
+                    if abs(x - ex) + abs(y - ey) <= self.spacing:
+                        if near is None:
+                            near = within(self.maze, x, y, self.spacing)
+                        if (ex, ey) in near:
+                            return False
+        return True
+
+    def _candidates(self):
+        # free を後ろから部分的にシャッフルし、未確認のマスを1つずつ返す
+        randrange = self.rng.randrange
+        for k in range(len(self.free) - 1, -1, -1):
+            self._swap(randrange(k + 1), k)
+            yield self.free[k]
+
+    def place(self, event_type, count, spaced=True):
+        """event_type のイベントを count 個配置し、座標のリストを返す
+
+        spaced が False なら間隔チェックをしない。count 個置けない場合は
+        何も配置せずに PlacementError を送出する。
+        """
+        placed = []
+        if count > 0:
+            for cell in self._candidates():
+                y, x = divmod(cell, self.width)
+                if not spaced or self.is_spaced(x, y, event_type):
+                    placed.append(cell)
+                    self._add_to_bucket(x, y, event_type)
+                    if len(placed) == count:
+                        break
+        if len(placed) < count:
+            for cell in placed:
+                y, x = divmod(cell, self.width)
+                self.buckets[self._bucket(x, y, event_type)].remove((x, y))
+            raise PlacementError(f"could not place {count} {event_type} tiles "
+                                 f"(only {len(placed)} valid cells left)")
+
+        coords = []
+        for cell in placed:
+            self._remove(cell)
+            y, x = divmod(cell, self.width)
+            self.events[(x, y)] = event_type
+            coords.append((x, y))
+        return coords
+
+    def random_free_cell(self):
+        """イベントのない道マスを1つ返す（配置はしない）"""
+        if not self.free:
+            raise PlacementError("no free floor cell left")
+        y, x = divmod(self.free[self.rng.randrange(len(self.free))], self.width)
+        return x, y
+
+
+# イベントマス生成関数
+def generate_event_tiles(maze, rng=random):
+    events = {}
+    index = PlacementIndex(maze, events, rng)
+
+    # 戦闘マス：3~5個を分散して配置
+    index.place("battle", rng.randint(3, 5))
+
+    # 回復マス：1つのみ配置
+    index.place("heal", 1)
+
+    # 強化マス：2~3個を分散して配置
+    index.place("buff", rng.randint(2, 3))
+
+    return events
+
+
+def _pick_free_cell(maze, events, rng, attempts=64, avoid=None):
+    # まずはランダムに数回試し、見つからなければ全マスの一覧から選ぶ
+    width, height = len(maze[0]), len(maze)
+    for _ in range(attempts):
+        x, y = rng.randint(1, width - 2), rng.randint(1, height - 2)
+        if maze[y][x] == 0 and (x, y) not in events and (x, y) != avoid:
+            return x, y
+    index = PlacementIndex(maze, events, rng)
+    if avoid is not None and index.pos[avoid[1] * index.width + avoid[0]] >= 0:
+        index._remove(avoid[1] * index.width + avoid[0])
+    return index.random_free_cell()
+
+def _pick_far_cell(maze, events, start, rng, avoid=None):
+    # start からの道のりが最も遠いマスの BOSS_FAR_RATIO 以上のマスから選ぶ
+    field = DistanceField(maze, [start])
+    width, dist = field.width, field.dist
+    farthest = max(dist)
+    threshold = max(1, math.ceil(farthest * BOSS_FAR_RATIO))
+    skip = -1 if avoid is None else avoid[1] * width + avoid[0]
+    candidates = [i for i, d in enumerate(dist)
+                  if d >= threshold and i != skip and (i % width, i // width) not in events]
+    if not candidates:
+        return _pick_free_cell(maze, events, rng, avoid=avoid)
+    y, x = divmod(candidates[rng.randrange(len(candidates))], width)
+    return x, y
+
+# ボスマスを生成
+# start を渡すと、そこから道のりで遠いマスに置く（渡さなければどこでもよい）。
+# avoid のマス（プレイヤーの今の位置）には置かない。足元に置くと踏めないため
+def spawn_boss_tile(maze, events, rng=random, start=None, avoid=None):
+    if start is None:
+        pos = _pick_free_cell(maze, events, rng, avoid=avoid)
+    else:
+        pos = _pick_far_cell(maze, events, start, rng, avoid)
+    events[pos] = "boss"
+    return pos
+
+# プレイヤーの初期位置をランダムに設定
+# イベントマスと被らないようにする
+def get_random_start(maze, events, rng=random):
+    return _pick_free_cell(maze, events, rng)
@@ -0,0 +1,172 @@
+"""フレーム時間のプロファイラと画面表示（HUD）
+
+有効にしたときだけ、登録した描画関数・pg.display.update を計測用の
+ラッパーに差し替え、画面への blit と pg.draw の呼び出し回数を数える。
+無効のときは元の関数に戻すので、計測のコストはかからない。
+計測するのはメインスレッドからの呼び出しだけで、階層の先読みスレッドが
+静的レイヤーを描いても、フレームの時間には数えない。
+直近 N フレームの計測値をリングバッファに持ち、処理ごとの p50/p99 を
+HUD に表示したり、JSON/CSV に書き出したりできる。
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import pygame as pg
+
+from assets import assets
+
+HUD_REFRESH_SEC = 0.5  # HUDの数値を更新する間隔
+HUD_POS = (8, 8)
+
+
+class CountingSurface:
+    """画面への blit の回数を数えるラッパー（それ以外は元の Surface に任せる）"""
+
+    def __init__(self, surface, profiler):
+        self.surface = surface
+        self.profiler = profiler
+
+    def blit(self, *args, **kwargs):
+        self.profiler.blits += 1
+        return self.surface.blit(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+
+class FrameProfiler:
+    def __init__(self, size=300):
+        self.enabled = False
+        self.show_hud = False
+        self.frames = deque(maxlen=size)  # 直近 size フレームの {処理名: ミリ秒, ...}
+        self.current = {}  # 計測中のフレーム
+        self.blits = 0
+        self.draws = 0
+        self.targets = []  # (モジュールなど, 関数名)
+        self.originals = {}
+        self.hud_surface = None
+        self.hud_updated = 0.0
+
+    def watch(self, owner, name):
+        """owner.name の関数を計測対象に登録する（処理名は関数名）"""
+        self.targets.append((owner, name))
+
+    def enable(self):
+        if self.enabled:
+            return
+        for owner, name in self.targets + [(pg.display, "update")]:
+            func = getattr(owner, name)
+            self.originals[(owner, name)] = func
+            stage = "display_update" if owner is pg.display else name
+            setattr(owner, name, self._timed(stage, func))
+        draw_rect = pg.draw.rect
+        self.originals[(pg.draw, "rect")] = draw_rect
+
+        main = threading.main_thread().ident
+
+        def counted_rect(surface, *args, **kwargs):
+            if threading.get_ident() == main:
+                self.draws += 1
+            if isinstance(surface, CountingSurface):
+                surface = surface.surface
+            return draw_rect(surface, *args, **kwargs)
+
+        pg.draw.rect = counted_rect
+        self.enabled = True
+
+    def disable(self):
+        for (owner, name), func in self.originals.items():
+            setattr(owner, name, func)
+        self.originals.clear()
+        self.enabled = False
+        self.show_hud = False
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+            self.show_hud = True
+
+    def _timed(self, stage, func):
+        main = threading.main_thread().ident
+
+        def wrapper(*args, **kwargs):
+            if threading.get_ident() != main:  # 先読みスレッドなどからの呼び出し
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+    def wrap(self, screen):
+        return CountingSurface(screen, self)
+
+    def add(self, stage, seconds):
+        self.current[stage] = self.current.get(stage, 0.0) + seconds * 1000
+
+    def end_frame(self):
+        record = self.current
+        record["blits"] = self.blits
+        record["draws"] = self.draws
+        self.frames.append(record)
+        self.current = {}
+        self.blits = self.draws = 0
+
+    def stages(self):
+        names = []
+        for record in self.frames:
+            for name in record:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def percentiles(self):
+        """処理ごとの (p50, p99)。そのフレームで呼ばれなかった処理は0として数える"""
+        result = {}
+        for name in self.stages():
+            values = sorted(record.get(name, 0.0) for record in self.frames)
+            result[name] = (values[len(values) // 2], values[min(len(values) - 1, len(values) * 99 // 100)])
+        return result
+
+    def dump(self, path):
+        """直近のフレームを .json か .csv に書き出す"""
+        names = self.stages()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"stages": names, "frames": list(self.frames)}, f)
+            return
+        import csv  # 書き出すときだけ使う（起動時には読み込まない）
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + names)
+            for i, record in enumerate(self.frames):
+                writer.writerow([i] + [round(record.get(name, 0), 4) for name in names])
+
+    def draw_hud(self, screen):
+        now = time.perf_counter()
+        if self.hud_surface is None or now - self.hud_updated >= HUD_REFRESH_SEC:
+            self.hud_surface = self.render_hud()
+            self.hud_updated = now
+        rect = screen.blit(self.hud_surface, HUD_POS)
+        pg.display.update(rect)
+
+    def render_hud(self):
+        font = assets.font(18)
+        lines = [f"{'stage':<16}{'p50':>7}{'p99':>7}"]
+        for name, (p50, p99) in self.percentiles().items():
+            lines.append(f"{name:<16}{p50:>7.2f}{p99:>7.2f}")
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(s.get_width() for s in rendered) + 8
+        hud = pg.Surface((width, len(rendered) * 16 + 6), pg.SRCALPHA)
+        hud.fill((0, 0, 0, 170))
+        for i, s in enumerate(rendered):
+            hud.blit(s, (4, 3 + i * 16))
+        return hud
+
+
+profiler = FrameProfiler()  # 全体で共有するプロファイラ
@@ -0,0 +1,178 @@
+"""入力の記録と、画面なしでの高速リプレイ
+
+ゲームを --seed と --record 付きで起動すると、キーとクリックの入力が
+時刻（ミリ秒）付きで記録される。このファイルをリプレイすると、同じシードで
+ゲームを作り直し（--load から再開したプレイなら記録しておいたセーブデータに
+戻し）、記録された入力を仮想時計の上で待ち時間なしに流し込む。
+タイマー（戦闘の間、キーリピートなど）も仮想時計で進むので、結果は元の
+プレイと同じになり、そのまま端から端までのベンチマークとして使える。
+
+    python replay.py recording.json
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import pygame as pg
+
+from profiler import profiler
+from scenes import SceneManager
+from snapshot import decode
+
+# 2: 階層を先読みパイプラインの乱数で生成する, 3: 道のりでイベントとボスを配置する,
+# 4: 戦闘でスキルのフラグを使わない, 5: 霧の中では見えたイベントマスだけに自動で歩く,
+# 6: ボスをプレイヤーの足元に置かない, 7: 入力は同じ時刻のタイマーと update の後に処理する,
+# 8: セーブデータから再開したプレイは settings["snapshot"] にその状態を持つ
+RECORDING_VERSION = 8
+
+
+class InputRecorder:
+    def __init__(self, seed, start_ms=0, settings=None):
+        self.seed = seed
+        self.start_ms = start_ms
+        self.settings = settings or {}  # start_game に渡した追加の引数（ワールドの大きさなど）
+        self.events = []  # [時刻, 種類, ...]
+
+    def record(self, now, event):
+        t = now - self.start_ms
+        if event.type in (pg.KEYDOWN, pg.KEYUP):
+            self.events.append([t, "keydown" if event.type == pg.KEYDOWN else "keyup", event.key])
+        elif event.type == pg.MOUSEBUTTONDOWN:
+            self.events.append([t, "click", event.button, event.pos[0], event.pos[1]])
+        elif event.type == pg.QUIT:
+            self.events.append([t, "quit"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"version": RECORDING_VERSION, "seed": self.seed, "settings": self.settings,
+                       "events": self.events}, f)
+
+
+def load_recording(path):
+    with open(path) as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"unsupported recording version: {recording.get('version')}")
+    return recording
+
+
+def to_pygame_event(entry):
+    kind = entry[1]
+    if kind == "keydown":
+        return pg.event.Event(pg.KEYDOWN, key=entry[2])
+    if kind == "keyup":
+        return pg.event.Event(pg.KEYUP, key=entry[2])
+    if kind == "click":
+        return pg.event.Event(pg.MOUSEBUTTONDOWN, button=entry[2], pos=(entry[3], entry[4]))
+    return pg.event.Event(pg.QUIT)
+
+
+class ReplayManager(SceneManager):
+    """記録された入力を仮想時計で流し込むシーンマネージャ"""
+
+    def __init__(self, screen, events, fps=60):
+        super().__init__(screen, fps)
+        self.now_ms = 0
+        self.pending = deque(events)
+        self.last_input_ms = 0
+
+    def ticks(self):
+        return self.now_ms
+
+    def wait_events(self, timeout):
+        # 次の入力と次の締め切りのうち早いほうまで時計を進める（実際には眠らない）
+        deadline = None if timeout is None else self.now_ms + timeout
+        if self.pending and (deadline is None or self.pending[0][0] <= deadline):
+            t = self.pending[0][0]
+            self.now_ms = max(self.now_ms, t)
+            events = []
+            while self.pending and self.pending[0][0] == t:
+                events.append(to_pygame_event(self.pending.popleft()))
+            return events
+        if not self.pending and deadline is None:
+            return [pg.event.Event(pg.QUIT)]  # 入力を使い切って待つものもなくなった
+        if not self.pending and self.now_ms > self.last_input_ms + 60_000:
+            return [pg.event.Event(pg.QUIT)]  # 入力なしでアニメーションだけが続いている
+        self.now_ms = deadline
+        return []
+
+    def dispatch(self, event):
+        self.last_input_ms = self.now_ms
+        super().dispatch(event)
+
+
+def run_replay(path, profile_path=None):
+    """記録をリプレイして、フレーム数・FPS・処理ごとの時間を辞書で返す
+
+    profile_path を渡すとプロファイラを有効にして、フレームごとの計測値を書き出す。
+    """
+    import random
+
+    import koukaton_roguelike as game  # 画面の初期化より後に読み込む
+
+    recording = load_recording(path)
+    pg.display.set_mode((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    manager = ReplayManager(pg.display.get_surface(), recording["events"], game.FPS)
+    if profile_path:
+        profiler.enable()
+    start = time.perf_counter()
+    settings = dict(recording.get("settings", {}))
+    data = settings.pop("snapshot", None)  # --load から始めた記録なら、入力の前にその状態に戻す
+    snapshot = decode(base64.b64decode(data)) if data else None
+    exploration = game.start_game(manager, random.Random(recording["seed"]), snapshot=snapshot, **settings)
+    manager.run()
+    wall = time.perf_counter() - start
+    exploration.floors.close()
+    if profile_path:
+        profiler.dump(profile_path)
+        profiler.disable()
+
+    player = exploration.player
+    return {
+        "seed": recording["seed"],
+        "inputs": len(recording["events"]),
+        "frames": manager.frames,
+        "game_seconds": manager.now_ms / 1000,
+        "wall_seconds": wall,
+        "fps": manager.frames / wall if wall else 0.0,
+        "stage_ms_per_frame": {stage: seconds * 1000 / max(1, manager.frames)
+                               for stage, seconds in manager.stage_times.items()},
+        "final_state": {"pos": list(exploration.player_pos), "hp": player.hp, "atk": player.atk,
+                        "def_": player.def_, "mp": player.mp, "skills": [s.name for s in player.skills]},
+        "profile": profiler.percentiles() if profile_path else None,  # 処理ごとの (p50, p99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録した入力を画面なしでリプレイする")
+    parser.add_argument("recording")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    parser.add_argument("--profile", metavar="PATH", help="フレームごとの計測値を書き出す（.json/.csv）")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pg.init()
+    report = run_replay(args.recording, args.profile)
+    pg.quit()
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    print(f"seed {report['seed']}: {report['inputs']} inputs, {report['frames']} frames "
+          f"({report['game_seconds']:.1f} s of play) in {report['wall_seconds']:.2f} s "
+          f"= {report['fps']:.0f} fps")
+    for stage, ms in report["stage_ms_per_frame"].items():
+        print(f"  {stage:<8}{ms:8.3f} ms/frame")
+    if report["profile"]:
+        print(f"  per-frame p50/p99 ({args.profile}):")
+        for stage, (p50, p99) in report["profile"].items():
+            print(f"    {stage:<16}{p50:8.3f}{p99:8.3f}")
+    print(f"  final state: {report['final_state']}")
+
+
+if __name__ == "__main__":
+    main()
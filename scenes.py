@@ -0,0 +1,232 @@
+"""シーン（探索・戦闘・強化・回復）を切り替えるスケジューラ
+
+メインループは1つだけで、pg.event.wait にタイムアウトを付けて
+「次の入力」「次のタイマー」「アニメーション中なら次のフレーム」の
+いずれかが来るまで眠る。待ち時間の演出は pg.time.wait ではなく
+after() のタイマーで行うので、待っている間もループは止まらない。
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+
+import pygame as pg
+
+from profiler import profiler
+
+
+class Scene:
+    animating = False  # Trueの間はフレームごとに描き直す
+    frame_ms = None  # アニメーションの描画間隔（Noneならマネージャの既定値）
+
+    def __init__(self):
+        self.manager = None
+        self.needs_redraw = True  # 次のループで描き直すかどうか
+
+    def enter(self):
+        """シーンが積まれたときに呼ばれる"""
+
+    def resume(self):
+        """上に積まれたシーンが終わって、再び一番上になったときに呼ばれる"""
+        self.needs_redraw = True
+
+    def invalidate(self):
+        """画面全体を描き直させる（HUDを消したときなど）"""
+        self.needs_redraw = True
+
+    def exit(self):
+        """シーンが取り除かれたときに呼ばれる"""
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, now):
+        """毎ループ呼ばれる（now は pg.time.get_ticks() のミリ秒）"""
+
+    def draw(self, screen, now):
+        pass
+
+
+class LatencyMeter:
+    """入力から画面反映までの遅延を計測する
+
+    入力で起こされた時刻（pg.event.wait から戻った時刻）から、その入力で
+    変化したフレームの pg.display.update が終わるまでを1サンプルとする。
+    """
+
+    def __init__(self, size=256):
+        self.samples = deque(maxlen=size)  # 直近の遅延（ミリ秒）
+        self.pending = None  # まだ画面に反映されていない最初の入力の時刻
+
+    def input_received(self, t):
+        if self.pending is None:
+            self.pending = t
+
+    def discard(self):
+        # 画面が変化しない入力（壁への移動など）は計測しない
+        self.pending = None
+
+    def frame_presented(self, t):
+        if self.pending is not None:
+            self.samples.append((t - self.pending) * 1000)
+            self.pending = None
+
+    def summary(self):
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {"count": len(ordered),
+                "mean_ms": sum(ordered) / len(ordered),
+                "p50_ms": ordered[len(ordered) // 2],
+                "p99_ms": ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)],
+                "max_ms": ordered[-1]}
+
+
+INPUT_EVENTS = (pg.KEYDOWN, pg.KEYUP, pg.MOUSEBUTTONDOWN)
+PROFILER_KEY = pg.K_F3  # プロファイラとHUDの切り替え
+PROFILE_DUMP_KEY = pg.K_F4  # 直近のフレームの計測値を書き出す
+
+
+class SceneManager:
+    def __init__(self, screen, fps=60):
+        self.screen = screen
+        self.frame_ms = 1000 // fps  # アニメーション中の描画間隔
+        self.scenes = []
+        self.timers = []  # (実行時刻, 通し番号, 関数) のヒープ
+        self.timer_ids = itertools.count()
+        self.next_frame = 0
+        self.now = None  # 処理中のループ（タイマーなら締め切り）の時刻。after() と入力の記録に使う
+        self.running = False
+        self.input_latency = LatencyMeter()
+        self.recorder = None  # 入力を記録するときは replay.InputRecorder を入れる
+        self.frames = 0  # 描画したフレーム数
+        self.stage_times = {"timers": 0.0, "update": 0.0, "draw": 0.0, "events": 0.0}  # 処理ごとの累計秒
+        self.profiler = profiler
+        self.profile_path = "profile.csv"  # F4 で書き出す先
+
+    @property
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def ticks(self):
+        """現在時刻（ミリ秒）。リプレイでは仮想時計に置き換える"""
+        return pg.time.get_ticks()
+
+    def wait_events(self, timeout):
+        """入力が来るか timeout ミリ秒経つまで眠り、届いたイベントのリストを返す"""
+        event = pg.event.wait() if timeout is None else pg.event.wait(timeout)
+        if event.type == pg.NOEVENT:
+            return []
+        return [event] + pg.event.get()
+
+    def push(self, scene):
+        scene.manager = self
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        scene.exit()
+        if self.scenes:
+            self.scenes[-1].resume()
+        return scene
+
+    def after(self, delay_ms, callback):
+        """delay_ms ミリ秒後に callback を呼ぶ（ブロックしない）"""
+        start = self.ticks() if self.now is None else self.now
+        heapq.heappush(self.timers, (start + delay_ms, next(self.timer_ids), callback))
+
+    def run_timers(self, now):
+        # 遅れて起きても、タイマーから仕掛けたタイマーは締め切りを起点に数える
+        while self.timers and self.timers[0][0] <= now:
+            self.now, _, callback = heapq.heappop(self.timers)
+            callback()
+        self.now = now
+
+    def next_timeout(self, now):
+        # 次に起きるべき時刻までのミリ秒（なければ None＝入力が来るまで眠る）
+        deadlines = []
+        if self.timers:
+            deadlines.append(self.timers[0][0])
+        scene = self.top
+        if scene is not None and (scene.animating or scene.needs_redraw):
+            deadlines.append(self.next_frame)
+        if not deadlines:
+            return None
+        return max(1, min(deadlines) - now)  # wait(0) は無期限に待つので最低1ms
+
+    def dispatch(self, event):
+        if self.recorder is not None:
+            self.recorder.record(self.now, event)
+        if event.type == pg.QUIT:
+            self.running = False
+        elif event.type == pg.KEYDOWN and event.key == PROFILER_KEY:
+            self.profiler.toggle()
+            if self.top is not None:
+                self.top.invalidate()
+        elif event.type == pg.KEYDOWN and event.key == PROFILE_DUMP_KEY:
+            self.profiler.dump(self.profile_path)
+            print(f"profile: {len(self.profiler.frames)} frames written to {self.profile_path}")
+        elif self.top is not None:
+            self.top.handle_event(event)
+
+    def run(self):
+        # 1回のループは「締め切りの来たタイマー → update → 届いた入力 → 描画」の順で、
+        # すべて同じ時刻 now で処理する。入力もこの時刻で記録するので、リプレイで
+        # 仮想時計をその時刻まで進めれば、タイマーと入力が同じ順に起きる
+        self.running = True
+        stage_times = self.stage_times
+        profiler = self.profiler
+        clock = time.perf_counter
+        events, woke = [], None
+        while self.running and self.scenes:
+            t0 = clock()
+            now = self.now = self.ticks()
+            self.run_timers(now)
+            t1 = clock()
+            stage_times["timers"] += t1 - t0
+            scene = self.top
+            if scene is None or not self.running:
+                break
+            scene.update(now)
+            t2 = clock()
+            stage_times["update"] += t2 - t1
+            if profiler.enabled:
+                profiler.add("timers", t1 - t0)
+                profiler.add("update", t2 - t1)
+            if events:
+                for event in events:
+                    if event.type in INPUT_EVENTS:
+                        self.input_latency.input_received(woke)
+                    self.dispatch(event)
+                scene = self.top
+                if scene is None or not (scene.needs_redraw or scene.animating):
+                    self.input_latency.discard()
+                t3 = clock()
+                stage_times["events"] += t3 - t2
+                if profiler.enabled:
+                    profiler.add("events", t3 - t2)
+                t2 = t3
+                if scene is None or not self.running:
+                    break
+            # 入力で変化したフレームは次のフレーム時刻を待たずにすぐ描く
+            frame_due = now >= self.next_frame or self.input_latency.pending is not None
+            if (scene.needs_redraw or scene.animating) and frame_due:
+                if profiler.enabled:
+                    scene.draw(profiler.wrap(self.screen), now)  # blit の回数を数える
+                else:
+                    scene.draw(self.screen, now)
+                t3 = clock()
+                stage_times["draw"] += t3 - t2
+                self.input_latency.frame_presented(t3)
+                self.frames += 1
+                scene.needs_redraw = False
+                self.next_frame = now + (scene.frame_ms or self.frame_ms)
+                if profiler.enabled:
+                    profiler.add("draw", t3 - t2)
+                    profiler.end_frame()
+                    if profiler.show_hud:
+                        profiler.draw_hud(self.screen)
+
+            events = self.wait_events(self.next_timeout(self.ticks()))
+            woke = clock()
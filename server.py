@@ -0,0 +1,136 @@
+"""多数のプレイを同時に扱う画面なしのゲームサーバー（asyncio）
+
+1つの接続が1つの GameSession を持ち、TCP か Unix ソケットで次の
+コンパクトなバイナリのメッセージをやりとりする。
+
+    フレーム : 長さ(u16) + 本体
+    要求     : 命令(u8) + 引数
+        HELLO(0) シード(u64)   新しいセッションを始める
+        MOVE(1)  方向(u8)      0:上 1:下 2:左 3:右
+        ACT(2)   行動(u8)      0:通常攻撃 1〜:スキル 255:ターン終了
+        BUFF(3)  選択(u8)      0:スキル追加 1:ステータス上昇
+        STATE(4)               現在の状態を返すだけ
+        STATS(5)               サーバーの統計
+    応答     : 結果(u8: 0 成功, 1 今はできない, 2 不正な要求) + session.STATE
+               （方向・行動・選択が範囲外なら 2、戦闘中の移動や壁への移動などは 1）
+
+接続ごとに要求を1つずつ処理し、応答を送り終えるまで次を読まないので、
+読まないクライアントはソケットのバッファが詰まった時点で止まる。
+同時セッション数が max_sessions に達したら、新しい接続は空きが出るまで待たせる。
+
+    python server.py --port 7777
+    python server.py --unix /tmp/koukaton.sock
+"""
+import argparse
+import asyncio
+import struct
+import time
+
+from session import BUFF_ACTIONS, DIRECTIONS, END_TURN, GameSession
+
+OP_HELLO, OP_MOVE, OP_ACT, OP_BUFF, OP_STATE, OP_STATS = range(6)
+OK, REJECTED, INVALID = range(3)
+
+FRAME = struct.Struct("<H")
+STATS = struct.Struct("<IIQd")  # 接続中のセッション, 累計セッション, 累計要求, CPU秒
+MAX_SESSIONS = 10_000
+
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+
+class GameServer:
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.slots = asyncio.Semaphore(max_sessions)
+        self.active = 0
+        self.total_sessions = 0
+        self.requests = 0
+
+    def process(self, session, payload):
+        """要求を1つ処理して (結果, 新しいセッション) を返す"""
+        op = payload[0]
+        if op == OP_HELLO and len(payload) == 9:
+            (seed,) = struct.unpack_from("<Q", payload, 1)
+            self.total_sessions += 1
+            return OK, GameSession(seed)
+        if session is None:
+            return INVALID, None
+        if op == OP_STATE:
+            return OK, session
+        if len(payload) != 2:
+            return INVALID, session
+        arg = payload[1]
+        # 引数が範囲外なら INVALID、正しい要求でも今のモードでできなければ REJECTED
+        if op == OP_MOVE:
+            if arg >= len(DIRECTIONS):
+                return INVALID, session
+            done = session.move(arg)
+        elif op == OP_ACT:
+            if arg > len(session.player.skills) and arg != END_TURN:
+                return INVALID, session
+            done = session.act(arg)
+        elif op == OP_BUFF:
+            if arg >= len(BUFF_ACTIONS):
+                return INVALID, session
+            done = session.choose_buff(arg)
+        else:
+            return INVALID, session
+        return (OK if done else REJECTED), session
+
+    def stats(self):
+        return STATS.pack(self.active, self.total_sessions, self.requests, time.process_time())
+
+    async def handle(self, reader, writer):
+        async with self.slots:  # 上限に達していたら空きが出るまで待たせる
+            self.active += 1
+            session = None
+            try:
+                while True:
+                    (size,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                    payload = await reader.readexactly(size)
+                    self.requests += 1
+                    if payload[:1] == bytes([OP_STATS]):
+                        writer.write(frame(bytes([OK]) + self.stats()))
+                    elif not payload:
+                        writer.write(frame(bytes([INVALID])))
+                    else:
+                        status, session = self.process(session, payload)
+                        writer.write(frame(bytes([status]) + (session.state() if session else b"")))
+                    await writer.drain()  # 相手が読まなければここで止まる
+                    await asyncio.sleep(0)  # 要求を溜めて送ってくる接続にループを占有させない
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                self.active -= 1
+                writer.close()
+
+
+async def serve(host="127.0.0.1", port=7777, unix=None, max_sessions=MAX_SESSIONS):
+    game_server = GameServer(max_sessions)
+    if unix:
+        server = await asyncio.start_unix_server(game_server.handle, path=unix)
+        print(f"listening on unix:{unix}", flush=True)
+    else:
+        server = await asyncio.start_server(game_server.handle, host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="画面なしのゲームサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777, help="0なら空いているポートを使う")
+    parser.add_argument("--unix", metavar="PATH", help="TCPの代わりにUnixソケットで待ち受ける")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
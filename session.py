@@ -0,0 +1,125 @@
+"""画面なしで1回のプレイを進めるセッション
+
+探索シーン・戦闘シーン・強化シーンと同じルールを、描画も待ち時間もなしに
+1手ずつ進める。セッションごとに乱数・プレイヤー・階層を持ち、他の
+セッションと状態を共有しないので、1つのプロセスで多数のプレイを同時に
+扱える（server.py から使う）。
+"""
+import random
+import struct
+
+from battle_engine import BattleEngine
+from entities import Boss, Player, apply_buff, handle_heal, spawn_enemy
+from floors import FloorPipeline
+from maze import move_player
+from placement import spawn_boss_tile
+
+WIDTH, HEIGHT = 11, 11
+
+# セッションの状態
+MODE_EXPLORE, MODE_BATTLE, MODE_BUFF, MODE_DEAD = range(4)
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # 上・下・左・右
+BUFF_ACTIONS = ["add_skill", "increase_stat"]
+END_TURN = 255  # act() でターンを終える番号（0: 通常攻撃, 1〜: スキル）
+
+# 状態: モード, 階層, x, y, hp, mp, atk, def_, 敵のhp, スキル数, 残りのイベントマス
+STATE = struct.Struct("<BHHHiiiiiBH")
+
+
+class GameSession:
+    def __init__(self, seed, width=WIDTH, height=HEIGHT, enemy_ai=None, player_kwargs=None):
+        self.rng = random.Random(seed)
+        self.player = Player(rng=self.rng, **(player_kwargs or {}))  # player_kwargs で初期ステータスを変えられる
+        self.floors = FloorPipeline(width, height, random.Random(self.rng.getrandbits(64)), depth=0)
+        self.enemy_ai = enemy_ai
+        self.mode = MODE_EXPLORE
+        self.battle = None  # 戦闘中の BattleEngine
+        self.pending_tile = None  # 処理中のイベントマス
+        self.moves = 0
+        self.battles_won = 0
+        self.new_floor()
+
+    def new_floor(self):
+        self.floor = self.floors.next_floor()
+        self.maze, self.events = self.floor.maze, self.floor.events
+        self.pos = self.floor.start
+        self.boss_spawned = False
+
+    def move(self, direction):
+        """direction は DIRECTIONS の番号。探索中でないときと壁に当たったときは何もしない"""
+        if self.mode != MODE_EXPLORE:
+            return False
+        result = move_player(self.pos, DIRECTIONS[direction], self.maze, self.events)
+        if result == self.pos:
+            return False
+        self.moves += 1
+        if not isinstance(result[0], str):
+            self.pos = result
+            return True
+        kind, x, y = result
+        self.pending_tile = (x, y)
+        if kind == "heal":
+            handle_heal(self.player, log=None)
+            self.finish_tile()
+        elif kind == "buff":
+            self.mode = MODE_BUFF
+        else:
+            enemy = Boss(rng=self.rng) if kind == "boss" else spawn_enemy(rng=self.rng)
+            self.battle = BattleEngine(self.player, enemy, rng=self.rng, enemy_ai=self.enemy_ai)
+            self.mode = MODE_BATTLE
+        return True
+
+    def act(self, action):
+        """戦闘中の行動（0: 通常攻撃, 1〜: 所持スキルの番号+1, END_TURN: ターン終了）"""
+        if self.mode != MODE_BATTLE:
+            return False
+        engine = self.battle
+        if action == 0:
+            choice = "attack"
+        elif action == END_TURN:
+            choice = "end_turn"
+        elif action <= len(self.player.skills):
+            choice = self.player.skills[action - 1]
+        else:
+            return False
+        if not engine.can_use(choice):
+            return False
+        engine.player_action(choice)
+        if not engine.is_over() and not engine.is_player_turn:
+            engine.enemy_turn()
+        if engine.is_over():
+            self.battle = None
+            if engine.player_won():
+                engine.grant_victory_reward()
+                self.battles_won += 1
+                self.mode = MODE_EXPLORE
+                self.finish_tile()
+            else:
+                self.mode = MODE_DEAD
+        return True
+
+    def choose_buff(self, index):
+        if self.mode != MODE_BUFF or not 0 <= index < len(BUFF_ACTIONS):
+            return False
+        apply_buff(self.player, BUFF_ACTIONS[index], self.rng, log=None)
+        self.mode = MODE_EXPLORE
+        self.finish_tile()
+        return True
+
+    def finish_tile(self):
+        # ExplorationScene.resume / update と同じ：マスを消し、ボスを倒したら次の階層へ
+        tile, self.pending_tile = self.pending_tile, None
+        if self.events[tile] == "boss":
+            self.new_floor()
+            return
+        del self.events[tile]
+        if not self.boss_spawned and all(e != "battle" for e in self.events.values()):
+            spawn_boss_tile(self.maze, self.events, self.rng, self.floor.start, self.pos)
+            self.boss_spawned = True
+
+    def state(self):
+        p = self.player
+        enemy_hp = self.battle.enemy.hp if self.battle is not None else 0
+        return STATE.pack(self.mode, self.floor.number, self.pos[0], self.pos[1],
+                          p.hp, p.mp, p.atk, p.def_, enemy_hp, min(255, len(p.skills)), len(self.events))
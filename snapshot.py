@@ -0,0 +1,189 @@
+"""プレイ状態のバイナリ保存と読み込み
+
+階層が変わるたびに保存しても気にならないよう、1ファイルに固定長の
+ヘッダーと次のセクションを順に詰める（数値はすべてリトルエンディアン）。
+
+    ヘッダー   : "KKTN", 形式のバージョン(u16)
+    乱数       : プレイの乱数と階層生成の乱数の状態（Random.getstate）
+    階層       : 階層の番号, ボスを出したか, プレイヤーの位置
+    迷路       : 幅, 高さ, 1マス1ビットに詰めた壁/道
+    イベント   : 個数, (マス番号 << 2 | 種類) の u32 の並び
+    戦闘参加者 : プレイヤー（と、戦闘中なら敵）のステータス・フラグ・スキル番号
+
+スキルは entities.SKILLS の番号で保存するので、スキル名や効果を変えても
+番号を変えなければ古いセーブデータを読める。
+"""
+import os
+import struct
+from array import array
+
+from entities import Boss, Enemy, Player, skill_by_id
+from maze import MazeGrid
+
+MAGIC = b"KKTN"
+SNAPSHOT_VERSION = 1
+
+EVENT_CODES = {"battle": 0, "heal": 1, "buff": 2, "boss": 3}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+# 戦闘参加者の種類
+KIND_PLAYER, KIND_ENEMY, KIND_BOSS = 0, 1, 2
+NO_SKILL = 255  # previous_skill がないとき
+
+# 迷路のビット詰め用（0/1 のバイト <-> "0"/"1" の文字）
+_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_ASCII = bytes.maketrans(b"01", b"\x00\x01")
+
+_HEADER = struct.Struct("<4sH")
+_FLOOR = struct.Struct("<IBII")
+_SIZE = struct.Struct("<II")
+_COMBATANT = struct.Struct("<BiiiiBBH")  # 種類, hp, mp, atk, def_, フラグ, 前のスキル, スキル数
+_GAUSS = struct.Struct("<Bd")
+
+
+class Snapshot:
+    def __init__(self, floor_number, maze, events, player_pos, player, boss_spawned=False,
+                 rng_state=None, floor_rng_state=None, enemy=None):
+        self.floor_number = floor_number
+        self.maze = maze
+        self.events = events
+        self.player_pos = player_pos
+        self.player = player
+        self.boss_spawned = boss_spawned
+        self.rng_state = rng_state  # プレイの乱数（random.Random.getstate の値）
+        self.floor_rng_state = floor_rng_state  # 次の階層を作る乱数
+        self.enemy = enemy  # 戦闘中の敵（なければNone）
+
+
+def _pack_rng(out, state):
+    version, internal, gauss = state
+    out += struct.pack("<BH", version, len(internal))
+    out += array("I", internal).tobytes()
+    out += _GAUSS.pack(gauss is not None, gauss or 0.0)
+
+
+def _unpack_rng(data, offset):
+    version, n = struct.unpack_from("<BH", data, offset)
+    offset += 3
+    internal = array("I")
+    internal.frombytes(data[offset:offset + n * 4])
+    offset += n * 4
+    has_gauss, gauss = _GAUSS.unpack_from(data, offset)
+    return (version, tuple(internal), gauss if has_gauss else None), offset + _GAUSS.size
+
+
+def _pack_maze(out, maze):
+    width, height = len(maze[0]), len(maze)
+    cells = maze.cells if isinstance(maze, MazeGrid) else b"".join(bytes(row) for row in maze)
+    out += _SIZE.pack(width, height)
+    n = width * height
+    # "0101..." の文字列を経由して1つの整数にすると、ビット詰めがCの速さで済む
+    out += int(bytes(cells).translate(_TO_ASCII), 2).to_bytes((n + 7) // 8, "big")
+
+
+def _unpack_maze(data, offset):
+    width, height = _SIZE.unpack_from(data, offset)
+    offset += _SIZE.size
+    n = width * height
+    size = (n + 7) // 8
+    bits = format(int.from_bytes(data[offset:offset + size], "big"), f"0{n}b")
+    maze = MazeGrid(width, height)
+    maze.cells[:] = bits.encode("ascii").translate(_FROM_ASCII)
+    return maze, offset + size
+
+
+def _pack_combatant(out, entity):
+    if isinstance(entity, Player):
+        kind = KIND_PLAYER
+    else:
+        kind = KIND_BOSS if isinstance(entity, Boss) else KIND_ENEMY
+    flags = (entity.next_attack_double | entity.next_attack_heal << 1 | entity.nullify_next_skill << 2)
+    previous = NO_SKILL
+    if kind != KIND_PLAYER and entity.previous_skill is not None:
+        previous = next(s.skill_id for s in entity.skills if s.name == entity.previous_skill)
+    out += _COMBATANT.pack(kind, entity.hp, getattr(entity, "mp", 0), entity.atk, entity.def_,
+                           flags, previous, len(entity.skills))
+    out += bytes(s.skill_id for s in entity.skills)
+
+
+def _unpack_combatant(data, offset):
+    kind, hp, mp, atk, def_, flags, previous, n = _COMBATANT.unpack_from(data, offset)
+    offset += _COMBATANT.size
+    skills = [skill_by_id(i) for i in data[offset:offset + n]]
+    # __init__ は乱数でスキルを選ぶので通らずに作る
+    cls = (Player, Enemy, Boss)[kind]
+    entity = cls.__new__(cls)
+    entity.hp, entity.atk, entity.def_, entity.skills = hp, atk, def_, skills
+    if kind == KIND_PLAYER:
+        entity.mp = mp
+    else:
+        entity.previous_skill = None if previous == NO_SKILL else skill_by_id(previous).name
+    entity.next_attack_double = bool(flags & 1)
+    entity.next_attack_heal = bool(flags & 2)
+    entity.nullify_next_skill = bool(flags & 4)
+    return entity, offset + n
+
+
+def encode(snapshot):
+    out = bytearray(_HEADER.pack(MAGIC, SNAPSHOT_VERSION))
+    _pack_rng(out, snapshot.rng_state)
+    _pack_rng(out, snapshot.floor_rng_state)
+    x, y = snapshot.player_pos
+    out += _FLOOR.pack(snapshot.floor_number, snapshot.boss_spawned, x, y)
+    _pack_maze(out, snapshot.maze)
+
+    width = len(snapshot.maze[0])
+    records = array("I", [(y * width + x) << 2 | EVENT_CODES[t] for (x, y), t in snapshot.events.items()])
+    out += struct.pack("<I", len(records))
+    out += records.tobytes()
+
+    _pack_combatant(out, snapshot.player)
+    out += struct.pack("<B", snapshot.enemy is not None)
+    if snapshot.enemy is not None:
+        _pack_combatant(out, snapshot.enemy)
+    return bytes(out)
+
+
+def decode(data):
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version: {version}")
+    offset = _HEADER.size
+    rng_state, offset = _unpack_rng(data, offset)
+    floor_rng_state, offset = _unpack_rng(data, offset)
+    floor_number, boss_spawned, x, y = _FLOOR.unpack_from(data, offset)
+    offset += _FLOOR.size
+    maze, offset = _unpack_maze(data, offset)
+
+    (count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    records = array("I")
+    records.frombytes(data[offset:offset + count * 4])
+    offset += count * 4
+    width = maze.width
+    events = {}
+    for record in records:
+        y_, x_ = divmod(record >> 2, width)
+        events[(x_, y_)] = EVENT_NAMES[record & 3]
+
+    player, offset = _unpack_combatant(data, offset)
+    enemy = None
+    if data[offset]:
+        enemy, offset = _unpack_combatant(data, offset + 1)
+    return Snapshot(floor_number, maze, events, (x, y), player, bool(boss_spawned),
+                    rng_state, floor_rng_state, enemy)
+
+
+def save(path, snapshot):
+    # 書きかけのファイルが残らないよう、一時ファイルに書いてから置き換える
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(snapshot))
+    os.replace(tmp, path)
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
@@ -0,0 +1,92 @@
+"""server.GameServer.process の応答コード（OK / REJECTED / INVALID）のテスト
+
+    python -m pytest test_server.py
+"""
+import pytest
+
+from distance import DistanceField
+from server import INVALID, OK, OP_ACT, OP_BUFF, OP_HELLO, OP_MOVE, REJECTED, GameServer
+from session import DIRECTIONS, END_TURN, MODE_BATTLE, MODE_BUFF, MODE_EXPLORE
+
+SEED = 2  # 最寄りの戦闘マスにも強化マスにも、他の戦闘マスを踏まずに行けるシード
+
+
+def hello(server, seed=SEED):
+    status, session = server.process(None, bytes([OP_HELLO]) + seed.to_bytes(8, "little"))
+    assert status == OK
+    return session
+
+
+def walk_into(session, kind):
+    # 一番近い kind のイベントマスまで1歩ずつ道を求め直して歩く
+    # （途中の回復マスはそのまま、強化マスはスキルを選んで通り抜ける）
+    while session.mode == MODE_EXPLORE or session.mode == MODE_BUFF and kind != "buff":
+        if session.mode == MODE_BUFF:
+            session.choose_buff(0)
+            continue
+        targets = [pos for pos, t in session.events.items() if t == kind]
+        x, y = DistanceField(session.maze, targets).path(*session.pos)[0]  # 今の位置の次のマス
+        assert session.move(DIRECTIONS.index((x - session.pos[0], y - session.pos[1])))
+    assert session.mode == (MODE_BUFF if kind == "buff" else MODE_BATTLE)
+
+
+@pytest.fixture
+def server():
+    return GameServer()
+
+
+@pytest.mark.parametrize("direction", [4, 5, 255])
+def test_move_out_of_range_is_invalid(server, direction):
+    session = hello(server)
+    assert server.process(session, bytes([OP_MOVE, direction])) == (INVALID, session)
+
+
+def test_move_into_wall_is_rejected(server):
+    session = hello(server)
+    x, y = session.pos
+    walls = [i for i, (dx, dy) in enumerate(DIRECTIONS) if not session.maze.is_path(x + dx, y + dy)]
+    assert walls
+    assert server.process(session, bytes([OP_MOVE, walls[0]])) == (REJECTED, session)
+    assert session.pos == (x, y)
+
+
+def test_move_during_battle_is_rejected(server):
+    session = hello(server)
+    walk_into(session, "battle")
+    assert session.mode == MODE_BATTLE
+    for direction in range(len(DIRECTIONS)):
+        assert server.process(session, bytes([OP_MOVE, direction])) == (REJECTED, session)
+
+
+def test_act_past_skill_count_is_invalid(server):
+    session = hello(server)
+    skills = len(session.player.skills)
+    assert server.process(session, bytes([OP_ACT, skills + 1])) == (INVALID, session)
+    walk_into(session, "battle")
+    assert server.process(session, bytes([OP_ACT, skills + 1])) == (INVALID, session)
+    assert server.process(session, bytes([OP_ACT, 254])) == (INVALID, session)
+    assert session.mode == MODE_BATTLE
+
+
+def test_act_outside_battle_is_rejected(server):
+    session = hello(server)
+    for action in range(len(session.player.skills) + 1):
+        assert server.process(session, bytes([OP_ACT, action])) == (REJECTED, session)
+    assert server.process(session, bytes([OP_ACT, END_TURN])) == (REJECTED, session)
+
+
+def test_act_in_battle_is_ok(server):
+    session = hello(server)
+    walk_into(session, "battle")
+    assert server.process(session, bytes([OP_ACT, 0])) == (OK, session)
+    assert server.process(session, bytes([OP_ACT, 0])) == (REJECTED, session)  # 攻撃は1ターンに1回
+    assert server.process(session, bytes([OP_ACT, END_TURN])) == (OK, session)
+
+
+def test_buff_out_of_range_is_invalid(server):
+    session = hello(server)
+    walk_into(session, "buff")
+    assert session.mode == MODE_BUFF
+    assert server.process(session, bytes([OP_BUFF, 2])) == (INVALID, session)
+    assert server.process(session, bytes([OP_BUFF, 1])) == (OK, session)
+    assert server.process(session, bytes([OP_BUFF, 1])) == (REJECTED, session)
@@ -0,0 +1,176 @@
+"""チャンクに分けた広いワールド
+
+画面よりずっと大きい迷路を CHUNK_SIZE x CHUNK_SIZE マスのチャンクに分け、
+必要になったチャンクだけを（ワールドのシードとチャンク座標から決まる乱数で）
+生成してメモリに置く。プレイヤーから離れたチャンクは捨て、また近づいたら
+同じ内容で作り直す。消費したイベントマスだけはワールド側で覚えておく。
+
+各チャンクは独立した穴掘り法の迷路で、チャンクの左端の列と上端の行
+（壁の列）に1か所ずつ扉を開けて隣のチャンクとつなぐ。
+"""
+import random
+from collections import OrderedDict
+
+from maze import PATH
+from maze_algorithms import MAZE_ALGORITHM, maze_generator
+from placement import PlacementIndex, get_random_start, spawn_boss_tile
+
+CHUNK_SIZE = 64  # 1チャンクのマス数（偶数: 左端と上端が壁の列になる）
+MAX_RESIDENT_CHUNKS = 16  # メモリに置いておくチャンクの上限
+RESIDENT_RADIUS = 1  # プレイヤーのいるチャンクから何チャンク先まで残すか
+
+# 1チャンクあたりのイベントマスの数（最小, 最大）
+CHUNK_EVENTS = {"battle": (24, 40), "heal": (8, 8), "buff": (16, 24)}
+
+
+class Chunk:
+    def __init__(self, cx, cy, maze, events):
+        self.cx, self.cy = cx, cy
+        self.maze = maze  # チャンク内の座標の MazeGrid
+        self.events = events  # ワールド座標 -> イベントの種類
+
+
+class WorldRow:
+    """maze[y][x] と len(maze[0]) の書き方でワールドを読むための1行"""
+
+    def __init__(self, world, y):
+        self.world = world
+        self.y = y
+
+    def __len__(self):
+        return self.world.width
+
+    def __getitem__(self, x):
+        return self.world.cell(x, self.y)
+
+
+class WorldEvents:
+    """ワールド全体のイベントマスを辞書のように扱う（必要ならチャンクを読み込む）"""
+
+    def __init__(self, world):
+        self.world = world
+
+    def __contains__(self, pos):
+        return pos in self.world.chunk_at(*pos).events
+
+    def __getitem__(self, pos):
+        return self.world.chunk_at(*pos).events[pos]
+
+    def get(self, pos, default=None):
+        return self.world.chunk_at(*pos).events.get(pos, default)
+
+    def __delitem__(self, pos):
+        self.world.remove_event(*pos)
+
+    def items(self):
+        """メモリにあるチャンクのイベントだけ"""
+        for chunk in list(self.world.chunks.values()):
+            yield from chunk.events.items()
+
+    def values(self):
+        for _, event_type in self.items():
+            yield event_type
+
+
+class ChunkedWorld:
+    def __init__(self, chunks_x, chunks_y, seed, chunk_size=CHUNK_SIZE, max_resident=MAX_RESIDENT_CHUNKS,
+                 algorithm=MAZE_ALGORITHM):
+        self.chunks_x, self.chunks_y = chunks_x, chunks_y
+        self.generate = maze_generator(algorithm)  # チャンクの迷路の生成関数
+        self.chunk_size = chunk_size
+        self.width, self.height = chunks_x * chunk_size, chunks_y * chunk_size
+        self.seed = seed
+        self.max_resident = max_resident
+        self.chunks = OrderedDict()  # (cx, cy) -> Chunk（最近使った順）
+        self.consumed = set()  # 消費したイベントマス（チャンクを作り直しても戻さない）
+        self.events = WorldEvents(self)
+        self.loads = 0
+        self.evictions = 0
+
+        # 初期位置は左上のチャンク、ボスは右下のチャンクに置く
+        first = self.chunk(0, 0)
+        local = {(x, y): t for (x, y), t in first.events.items()}
+        self.start = get_random_start(first.maze, local, random.Random(f"{seed}:start"))
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        return WorldRow(self, y)
+
+    def chunk_rng(self, cx, cy):
+        return random.Random(f"{self.seed}:{cx}:{cy}")
+
+    def chunk(self, cx, cy):
+        chunk = self.chunks.get((cx, cy))
+        if chunk is not None:
+            self.chunks.move_to_end((cx, cy))
+            return chunk
+        chunk = self.load(cx, cy)
+        self.chunks[(cx, cy)] = chunk
+        self.loads += 1
+        while len(self.chunks) > self.max_resident:
+            self.chunks.popitem(last=False)
+            self.evictions += 1
+        return chunk
+
+    def chunk_at(self, x, y):
+        return self.chunk(x // self.chunk_size, y // self.chunk_size)
+
+    def load(self, cx, cy):
+        size = self.chunk_size
+        rng = self.chunk_rng(cx, cy)
+        maze = self.generate(size, size, rng)
+        # 隣のチャンク（左と上）への扉を奇数の位置に開ける
+        if cx > 0:
+            maze[rng.randrange(1, size, 2)][0] = PATH
+        if cy > 0:
+            maze[0][rng.randrange(1, size, 2)] = PATH
+
+        local = {}
+        index = PlacementIndex(maze, local, rng)
+        for event_type, (low, high) in CHUNK_EVENTS.items():
+            index.place(event_type, rng.randint(low, high))
+        if (cx, cy) == (self.chunks_x - 1, self.chunks_y - 1):
+            spawn_boss_tile(maze, local, rng)
+
+        ox, oy = cx * size, cy * size
+        events = {}
+        for (x, y), event_type in local.items():
+            pos = (ox + x, oy + y)
+            if pos not in self.consumed:
+                events[pos] = event_type
+        return Chunk(cx, cy, maze, events)
+
+    def cell(self, x, y):
+        size = self.chunk_size
+        return self.chunk(x // size, y // size).maze[y % size][x % size]
+
+    def is_path(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.cell(x, y) == PATH
+
+    def remove_event(self, x, y):
+        del self.chunk_at(x, y).events[(x, y)]
+        self.consumed.add((x, y))
+
+    def chunks_in(self, x0, y0, x1, y1):
+        """マスの範囲 [x0, x1) x [y0, y1) に重なるチャンクの座標"""
+        size = self.chunk_size
+        return [(cx, cy)
+                for cy in range(max(0, y0 // size), min(self.chunks_y, (y1 - 1) // size + 1))
+                for cx in range(max(0, x0 // size), min(self.chunks_x, (x1 - 1) // size + 1))]
+
+    def retain_around(self, x, y, radius=RESIDENT_RADIUS):
+        """(x, y) のチャンクから radius チャンク以内を読み込み、それより遠いものを捨てる"""
+        size = self.chunk_size
+        pcx, pcy = x // size, y // size
+        for key in [k for k in self.chunks if max(abs(k[0] - pcx), abs(k[1] - pcy)) > radius]:
+            del self.chunks[key]
+            self.evictions += 1
+        for cy in range(max(0, pcy - radius), min(self.chunks_y, pcy + radius + 1)):
+            for cx in range(max(0, pcx - radius), min(self.chunks_x, pcx + radius + 1)):
+                self.chunk(cx, cy)
+
+    def stats(self):
+        return {"resident": len(self.chunks), "loads": self.loads, "evictions": self.evictions,
+                "consumed": len(self.consumed)}